@@ -0,0 +1,86 @@
+import os
+import json
+import click
+import threading
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+from compression import compress_response
+
+# The Swagger UI, the spec it renders and its assets
+DOCS_PATHS = ("/apidocs", "/apispec_1.json", "/flasgger_static")
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def swag_from(filename):
+    # Sets the attributes flasgger's swag_from sets, without importing it
+    def decorator(function):
+        function.swag_path = os.path.join(ROOT_PATH, filename)
+        function.swag_type = filename.rsplit(".", 1)[-1]
+        return function
+
+    return decorator
+
+
+def build_apispec(app):
+    from flasgger import Swagger
+
+    # Parses the yml files of the views, without registering flasgger on app
+    swagger = Swagger()
+    swagger.app = app
+    with app.app_context():
+        return json.loads(json.dumps(swagger.get_apispecs()))
+
+
+def load_apispec(app):
+    path = app.config["APISPEC_PATH"]
+    if path is None:
+        return build_apispec(app)
+    with open(path) as f:
+        return json.load(f)
+
+
+def create_docs_app(app):
+    from flasgger import Swagger
+
+    docs = Flask(__name__)
+    docs.config.update(app.config)
+    docs.after_request(compress_response)
+    Swagger(docs, template=load_apispec(app))
+    return docs
+
+
+class LazyDocs:
+    # flasgger and the spec are loaded by the first request for the docs,
+    # instead of by every worker when it starts
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self._docs = None
+        self._lock = threading.Lock()
+
+    def docs(self):
+        if self._docs is None:
+            with self._lock:
+                if self._docs is None:
+                    self._docs = create_docs_app(self.app)
+        return self._docs
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(DOCS_PATHS):
+            return self.docs()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def init_apidocs(app):
+    app.wsgi_app = LazyDocs(app)
+
+
+@click.command("apispec")
+@click.argument("output", type=click.File("w"), default="-")
+@with_appcontext
+def apispec_command(output):
+    """Write the API spec as JSON, to be served from APISPEC_PATH."""
+    json.dump(build_apispec(current_app), output, indent=2, sort_keys=True)
+    output.write("\n")
@@ -1,316 +1,559 @@
-from flask import Flask, jsonify, redirect, request, abort
+import os
+from flask import Flask, redirect, request, abort
 from dotenv import load_dotenv
 from flask_cors import CORS
-from flasgger import Swagger, swag_from
-from icecream import ic
 
 
-from database import setup_db
+from database import db, setup_db
+from database.pool import pool_stats
+from database.replicas import get_replica_set, pin_after_write
+from database.batch import insert_many, update_many, delete_many
+from database.statements import update_one, delete_one, exists
+from database.projection import project
+from database.castings import Castings, load_casts, load_filmographies
+from database.search import search, search_reindex_command
 from database.movies import Movies
 from database.actors import Actors
 from auth import requires_auth, AuthError
-
-
-class RequestError(Exception):
-    def __init__(self, error, status_code):
-        self.error = error
-        self.status_code = status_code
-
-
-def paginate(itemsList=[], page=1, size=10):
-    startIndex = (page - 1) * size
-    endIndex = startIndex + size
-    if startIndex >= len(itemsList):
-        raise RequestError(
-            {
-                "code": "resource_not_found",
-                "description": "The requested page does not contain any record",
-            },
-            404,
-        )
-    selectedItems = [item.format() for item in itemsList[startIndex:endIndex]]
-    return selectedItems
+from errors import RequestError
+from serialization import jsonify, ISOJSONEncoder
+from etags import (
+    entity_etag,
+    is_not_modified,
+    not_modified,
+    if_match_versions,
+    precondition_failed,
+    conditional_response,
+)
+from pagination import paginate, order_by_keys, page_args
+from filters import (
+    filter_movies,
+    filter_actors,
+    sort_keys,
+    MOVIES_SORTABLE,
+    ACTORS_SORTABLE,
+)
+from export import export
+from compression import compress_response
+from importer import import_data_command
+from apidocs import swag_from, init_apidocs, apispec_command
+from cache import require_shared
+from cache.entities import get_entity, get_entity_version, get_entity_cache
+from cache.responses import cached_response, get_response_cache
+from auth.token_cache import get_token_cache
+from validation import (
+    validate_new_movies,
+    validate_new_actor,
+    validate_movies_update,
+    validate_actor_update,
+    validate_ids,
+    validate_batch,
+    validate_batch_update,
+    validate_fields,
+    validate_search_query,
+    validate_new_casting,
+    validate_include,
+)
 
 
 def create_app(database_path=None):
     load_dotenv()
     app = Flask(__name__)
+    app.json_encoder = ISOJSONEncoder
+    app.config["JSON_BACKEND"] = os.environ.get("JSON_BACKEND", "orjson")
+    app.config["MAX_PAGE_SIZE"] = int(os.environ.get("MAX_PAGE_SIZE", 100))
+    app.config["MAX_BATCH_SIZE"] = int(os.environ.get("MAX_BATCH_SIZE", 1000))
+    app.config["MAX_CONTENT_LENGTH"] = int(
+        os.environ.get("MAX_CONTENT_LENGTH", 1024 * 1024)
+    )
+    app.config["EXPORT_CHUNK_SIZE"] = int(os.environ.get("EXPORT_CHUNK_SIZE", 1000))
+    app.config["COUNT_STRATEGY"] = os.environ.get("COUNT_STRATEGY", "exact")
+    app.config["COUNT_CACHE_TTL"] = int(os.environ.get("COUNT_CACHE_TTL", 60))
+    app.config["COUNT_ESTIMATE_THRESHOLD"] = int(
+        os.environ.get("COUNT_ESTIMATE_THRESHOLD", 100000)
+    )
+    app.config["COMPRESS_ENABLED"] = os.environ.get(
+        "COMPRESS_ENABLED", "true"
+    ).lower() in ("1", "true", "yes")
+    app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+    app.config["COMPRESS_LEVEL"] = int(os.environ.get("COMPRESS_LEVEL", 6))
+    app.config["COMPRESS_BR_QUALITY"] = int(os.environ.get("COMPRESS_BR_QUALITY", 4))
+    app.config["APISPEC_PATH"] = os.environ.get("APISPEC_PATH")
     setup_db(app, database_path)
+    # Fails at startup rather than on the first read when misconfigured
+    if app.config["COUNT_STRATEGY"] == "cached":
+        require_shared("COUNT_STRATEGY=cached")
+    get_entity_cache()
+    get_response_cache()
     CORS(app)
-    swagger = Swagger(app)
+    app.cli.add_command(import_data_command)
+    app.cli.add_command(search_reindex_command)
+    app.cli.add_command(apispec_command)
+    init_apidocs(app)
+
+    @app.before_request
+    def limit_content_length():
+        # Werkzeug only enforces MAX_CONTENT_LENGTH for form data, not JSON
+        maxLength = app.config["MAX_CONTENT_LENGTH"]
+        if request.content_length is not None and request.content_length > maxLength:
+            abort(413)
+
+    app.after_request(compress_response)
+    app.after_request(pin_after_write)
 
     @app.route("/")
     def index():
         return redirect("/apidocs")
 
+    @app.route("/stats")
+    @requires_auth()
+    @swag_from("api_doc/get_stats.yml")
+    def get_stats(payload):
+        return jsonify(
+            {
+                "success": True,
+                "token_cache": get_token_cache().stats(),
+                "entity_cache": get_entity_cache().stats(),
+                "response_cache": get_response_cache().stats(),
+                "db_pool": pool_stats(db.engine),
+                "db_replicas": (
+                    None if get_replica_set() is None else get_replica_set().stats()
+                ),
+            }
+        )
+
+    @app.route("/search")
+    @requires_auth()
+    @swag_from("api_doc/search.yml")
+    def search_catalog(payload):
+        query = validate_search_query(request.args.get("q"))
+        page, size = page_args()
+
+        # Only search the tables the token is allowed to read
+        kinds = [
+            kind
+            for kind, permission in [("movie", "read:movies"), ("actor", "read:actors")]
+            if permission in payload.get("permissions", [])
+        ]
+        if len(kinds) == 0:
+            raise AuthError(
+                {"code": "unauthorized", "description": "Permission not granted"}, 403
+            )
+
+        results, total = search(query, kinds, size, (page - 1) * size)
+        return jsonify(
+            {
+                "success": True,
+                "results": results,
+                "page": page,
+                "total": total,
+            }
+        )
+
     @app.route("/movies", methods=["POST"])
     @requires_auth("create:movies")
     @swag_from("api_doc/create_movies.yml")
     def create_movies(payload):
-        reqBody = request.get_json()
-        if reqBody is None:
-            raise RequestError(
-                {"code": "empty_content", "description": "No movies details provided"},
-                400,
-            )
-
-        title = reqBody.get("title")
-        release_date = reqBody.get("release_date")
-
-        if title is None or release_date is None:
-            raise RequestError(
-                {"code": "missing_field", "description": "Missing movies details"},
-                400,
-            )
-
-        if type(title) is not str or type(release_date) is not str:
-            raise RequestError(
-                {"code": "invalid_format", "description": "Invalid movies details"},
-                400,
-            )
+        record = validate_new_movies(request.get_json())
         try:
-            movies = Movies(title, release_date)
+            movies = Movies(**record)
             movies.insert()
         except:
             abort(500)
 
         return jsonify({"success": True, "movies": movies.format()})
 
+    @app.route("/movies/batch", methods=["POST"])
+    @requires_auth("create:movies")
+    @swag_from("api_doc/create_movies_batch.yml")
+    def create_movies_batch(payload):
+        records = validate_batch(
+            request.get_json(), validate_new_movies, app.config["MAX_BATCH_SIZE"]
+        )
+        try:
+            createdItems = insert_many(Movies, records)
+        except:
+            abort(500)
+
+        return jsonify(
+            {"success": True, "movies": createdItems, "created": len(createdItems)}
+        )
+
     @app.route("/movies")
     @requires_auth("read:movies")
     @swag_from("api_doc/get_movies.yml")
     def get_movies(payload):
-        page = request.args.get("page", 1, type=int)
-        size = request.args.get("size", 10, type=int)
-        itemsList = Movies.query.order_by(Movies.id).all()
-        selectedItems = paginate(itemsList, page, size)
-        return jsonify(
-            {
-                "success": True,
-                "movies": selectedItems,
-                "page": page,
-                "total": len(itemsList),
-            }
+        fields = validate_fields(Movies, request.args.get("fields"))
+        sortKeys = sort_keys(Movies, MOVIES_SORTABLE)
+        include = validate_include(request.args.get("include"), "cast")
+        if include and fields is not None and "id" not in fields:
+            # Related records are attached by id
+            fields = ["id"] + fields
+
+        def compute():
+            query = filter_movies(
+                project(Movies, fields, [column for column, _ in sortKeys])
+            )
+            selectedItems, pageInfo = paginate(query, sortKeys, Movies, fields)
+            if include:
+                related = load_casts([item["id"] for item in selectedItems])
+                for item in selectedItems:
+                    item["cast"] = related[item["id"]]
+            return {"success": True, "movies": selectedItems, **pageInfo}
+
+        return conditional_response(
+            jsonify(
+                cached_response(
+                    "movies",
+                    payload,
+                    compute,
+                    ("castings", "actors") if include else (),
+                )
+            )
         )
 
+    @app.route("/movies/export")
+    @requires_auth("read:movies")
+    @swag_from("api_doc/export_movies.yml")
+    def export_movies(payload):
+        fields = validate_fields(Movies, request.args.get("fields"))
+        sortKeys = sort_keys(Movies, MOVIES_SORTABLE)
+        query = filter_movies(project(Movies, fields))
+        return export(order_by_keys(query, sortKeys), Movies, fields)
+
     @app.route("/movies/<int:id>")
     @requires_auth("read:movies")
     @swag_from("api_doc/get_movies_by_id.yml")
     def get_movies_by_id(payload, id):
-        movie = Movies.query.get(id)
+        fields = validate_fields(Movies, request.args.get("fields"))
+        if request.if_none_match:
+            version = get_entity_version(Movies, id)
+            etag = entity_etag(version, fields)
+            if version is not None and is_not_modified(etag):
+                return not_modified(etag)
+
+        movie = get_entity(Movies, id)
         if movie is None:
             raise RequestError(
                 {"code": "not_found", "description": "No such movies found"},
                 404,
             )
-        return jsonify({"success": True, "movie": movie.format()})
+        item = movie["item"]
+        if fields is not None:
+            item = {field: item[field] for field in fields}
+        response = jsonify({"success": True, "movie": item})
+        response.set_etag(entity_etag(movie["version"], fields))
+        return response
+
+    @app.route("/movies", methods=["PATCH"])
+    @requires_auth("update:movies")
+    @swag_from("api_doc/update_movies_batch.yml")
+    def update_movies_batch(payload):
+        updates = validate_batch_update(
+            request.get_json(), validate_movies_update, app.config["MAX_BATCH_SIZE"]
+        )
+        try:
+            updatedIds, missingIds = update_many(Movies, updates)
+        except:
+            abort(500)
+
+        return jsonify({"success": True, "updated": updatedIds, "missing": missingIds})
+
+    @app.route("/movies", methods=["DELETE"])
+    @requires_auth("delete:movies")
+    @swag_from("api_doc/delete_movies_batch.yml")
+    def delete_movies_batch(payload):
+        reqBody = request.get_json()
+        ids = validate_ids(
+            reqBody.get("ids") if type(reqBody) is dict else None,
+            app.config["MAX_BATCH_SIZE"],
+        )
+        try:
+            deletedIds, missingIds = delete_many(Movies, ids)
+        except:
+            abort(500)
+
+        return jsonify({"success": True, "deleted": deletedIds, "missing": missingIds})
 
     @app.route("/movies/<int:id>", methods=["PATCH"])
     @requires_auth("update:movies")
     @swag_from("api_doc/update_movies.yml")
     def update_movies(payload, id):
-        reqBody = request.get_json()
-        if reqBody is None:
-            raise RequestError(
-                {"code": "empty_content", "description": "No movies details provided"},
-                400,
-            )
+        fields = validate_movies_update(request.get_json())
+        versions = if_match_versions()
 
-        title = reqBody.get("title")
-        release_date = reqBody.get("release_date")
+        try:
+            updated = update_one(Movies, id, fields, versions)
+        except:
+            abort(500)
 
-        if title is None and release_date is None:
+        if updated is None:
+            if versions is not None and exists(Movies, id):
+                raise precondition_failed()
             raise RequestError(
-                {"code": "empty_content", "description": "No movies details provided"},
-                400,
+                {"code": "not_found", "description": "No such movies found"},
+                404,
             )
 
+        movies, version = updated
+        response = jsonify({"success": True, "movies": movies})
+        response.set_etag(entity_etag(version))
+        return response
+
+    @app.route("/movies/<int:id>", methods=["DELETE"])
+    @requires_auth("delete:movies")
+    @swag_from("api_doc/delete_movies.yml")
+    def delete_movies(payload, id):
         try:
-            movies = Movies.query.get(id)
+            deleted = delete_one(Movies, id)
         except:
+            abort(500)
+
+        if not deleted:
+            raise RequestError(
+                {"code": "not_found", "description": "Movies not found"},
+                404,
+            )
+
+        return jsonify({"success": True, "deleted": id})
+
+    @app.route("/movies/<int:id>/cast")
+    @requires_auth("read:movies")
+    @swag_from("api_doc/get_movies_cast.yml")
+    def get_movies_cast(payload, id):
+        if not exists(Movies, id):
             raise RequestError(
                 {"code": "not_found", "description": "No such movies found"},
                 404,
             )
 
-        if title is not None:
-            if type(title) is not str:
-                raise RequestError(
-                    {"code": "invalid_format", "description": "Invalid movies details"},
-                    400,
-                )
-            movies.title = title
-        if release_date is not None:
-            if type(release_date) is not str:
-                raise RequestError(
-                    {"code": "invalid_format", "description": "Invalid movies details"},
-                    400,
-                )
-            movies.release_date = release_date
+        return jsonify({"success": True, "cast": load_casts([id])[id]})
+
+    @app.route("/movies/<int:id>/cast", methods=["POST"])
+    @requires_auth("update:movies")
+    @swag_from("api_doc/create_casting.yml")
+    def create_casting(payload, id):
+        record = validate_new_casting(request.get_json())
+        if not exists(Movies, id) or not exists(Actors, record["actor_id"]):
+            raise RequestError(
+                {"code": "not_found", "description": "Movies or actors not found"},
+                404,
+            )
+        if Castings.query.get((id, record["actor_id"])) is not None:
+            raise RequestError(
+                {
+                    "code": "already_cast",
+                    "description": "The actor is already cast in this movie",
+                },
+                409,
+            )
 
         try:
-            movies.update()
+            casting = Castings(id, **record)
+            casting.insert()
         except:
             abort(500)
 
-        return jsonify({"success": True, "movies": movies.format()})
+        return jsonify({"success": True, "casting": casting.format()})
 
-    @app.route("/movies/<int:id>", methods=["DELETE"])
-    @requires_auth("delete:movies")
-    @swag_from("api_doc/delete_movies.yml")
-    def delete_movies(payload, id):
-        movies = Movies.query.get(id)
-        if movies is None:
+    @app.route("/movies/<int:id>/cast/<int:actor_id>", methods=["DELETE"])
+    @requires_auth("update:movies")
+    @swag_from("api_doc/delete_casting.yml")
+    def delete_casting(payload, id, actor_id):
+        casting = Castings.query.get((id, actor_id))
+        if casting is None:
             raise RequestError(
-                {"code": "not_found", "description": "Movies not found"},
+                {"code": "not_found", "description": "Casting not found"},
                 404,
             )
 
         try:
-            movies.delete()
+            casting.delete()
         except:
             abort(500)
 
-        return jsonify({"success": True, "deleted": id})
+        return jsonify(
+            {"success": True, "deleted": {"movie_id": id, "actor_id": actor_id}}
+        )
 
     @app.route("/actors")
     @requires_auth("read:actors")
     @swag_from("api_doc/get_actors.yml")
     def get_actors(payload):
-        page = request.args.get("page", 1, type=int)
-        size = request.args.get("size", 10, type=int)
-        itemsList = Actors.query.order_by(Actors.id).all()
-        selectedItems = paginate(itemsList, page, size)
-        return jsonify(
-            {
-                "success": True,
-                "actors": selectedItems,
-                "page": page,
-                "total": len(itemsList),
-            }
+        fields = validate_fields(Actors, request.args.get("fields"))
+        sortKeys = sort_keys(Actors, ACTORS_SORTABLE)
+        include = validate_include(request.args.get("include"), "filmography")
+        if include and fields is not None and "id" not in fields:
+            # Related records are attached by id
+            fields = ["id"] + fields
+
+        def compute():
+            query = filter_actors(
+                project(Actors, fields, [column for column, _ in sortKeys])
+            )
+            selectedItems, pageInfo = paginate(query, sortKeys, Actors, fields)
+            if include:
+                related = load_filmographies([item["id"] for item in selectedItems])
+                for item in selectedItems:
+                    item["filmography"] = related[item["id"]]
+            return {"success": True, "actors": selectedItems, **pageInfo}
+
+        return conditional_response(
+            jsonify(
+                cached_response(
+                    "actors",
+                    payload,
+                    compute,
+                    ("castings", "movies") if include else (),
+                )
+            )
         )
 
     @app.route("/actors", methods=["POST"])
     @requires_auth("create:actors")
     @swag_from("api_doc/create_actors.yml")
     def create_actors(payload):
-        reqBody = request.get_json()
-        if reqBody is None:
-            raise RequestError(
-                {"code": "empty_content", "description": "No actor details provided"},
-                400,
-            )
+        record = validate_new_actor(request.get_json())
+        try:
+            actor = Actors(**record)
+            actor.insert()
+        except:
+            abort(500)
 
-        name = reqBody.get("name")
-        age = reqBody.get("age")
-        gender = reqBody.get("gender")
+        return jsonify({"success": True, "actor": actor.format()})
 
-        if name is None or age is None or gender is None:
-            raise RequestError(
-                {"code": "missing_field", "description": "Missing actor details"},
-                400,
-            )
+    @app.route("/actors/batch", methods=["POST"])
+    @requires_auth("create:actors")
+    @swag_from("api_doc/create_actors_batch.yml")
+    def create_actors_batch(payload):
+        records = validate_batch(
+            request.get_json(), validate_new_actor, app.config["MAX_BATCH_SIZE"]
+        )
+        try:
+            createdItems = insert_many(Actors, records)
+        except:
+            abort(500)
 
-        if type(name) is not str or type(age) is not int or type(gender) is not str:
-            raise RequestError(
-                {"code": "invalid_format", "description": "Invalid actor details"},
-                400,
-            )
+        return jsonify(
+            {"success": True, "actors": createdItems, "created": len(createdItems)}
+        )
+
+    @app.route("/actors", methods=["PATCH"])
+    @requires_auth("update:actors")
+    @swag_from("api_doc/update_actors_batch.yml")
+    def update_actors_batch(payload):
+        updates = validate_batch_update(
+            request.get_json(), validate_actor_update, app.config["MAX_BATCH_SIZE"]
+        )
         try:
-            actor = Actors(name, age, gender)
-            actor.insert()
+            updatedIds, missingIds = update_many(Actors, updates)
         except:
             abort(500)
 
-        return jsonify({"success": True, "actor": actor.format()})
+        return jsonify({"success": True, "updated": updatedIds, "missing": missingIds})
+
+    @app.route("/actors", methods=["DELETE"])
+    @requires_auth("delete:actors")
+    @swag_from("api_doc/delete_actors_batch.yml")
+    def delete_actors_batch(payload):
+        reqBody = request.get_json()
+        ids = validate_ids(
+            reqBody.get("ids") if type(reqBody) is dict else None,
+            app.config["MAX_BATCH_SIZE"],
+        )
+        try:
+            deletedIds, missingIds = delete_many(Actors, ids)
+        except:
+            abort(500)
+
+        return jsonify({"success": True, "deleted": deletedIds, "missing": missingIds})
 
     @app.route("/actors/<int:id>", methods=["PATCH"])
     @requires_auth("update:actors")
     @swag_from("api_doc/update_actors.yml")
     def update_actors(payload, id):
-        reqBody = request.get_json()
-        if reqBody is None:
-            raise RequestError(
-                {"code": "empty_content", "description": "No actor details provided"},
-                400,
-            )
-
-        name = reqBody.get("name")
-        age = reqBody.get("age")
-        gender = reqBody.get("gender")
-
-        if name is None and age is None and gender is None:
-            raise RequestError(
-                {"code": "empty_content", "description": "No actor details provided"},
-                400,
-            )
+        fields = validate_actor_update(request.get_json())
+        versions = if_match_versions()
 
         try:
-            actor = Actors.query.get(id)
+            updated = update_one(Actors, id, fields, versions)
         except:
+            abort(500)
+
+        if updated is None:
+            if versions is not None and exists(Actors, id):
+                raise precondition_failed()
             raise RequestError(
                 {"code": "not_found", "description": "No such actor found"},
                 404,
             )
 
-        if name is not None:
-            if type(name) is not str:
-                raise RequestError(
-                    {"code": "invalid_format", "description": "Invalid actor details"},
-                    400,
-                )
-            actor.name = name
-        if age is not None:
-            if type(age) is not int:
-                raise RequestError(
-                    {"code": "invalid_format", "description": "Invalid actor details"},
-                    400,
-                )
-            actor.age = age
-        if gender is not None:
-            if type(gender) is not str:
-                raise RequestError(
-                    {"code": "invalid_format", "description": "Invalid actor details"},
-                    400,
-                )
-            actor.gender = gender
-
-        try:
-            actor.update()
-        except:
-            abort(500)
-
-        return jsonify({"success": True, "actor": actor.format()})
+        actor, version = updated
+        response = jsonify({"success": True, "actor": actor})
+        response.set_etag(entity_etag(version))
+        return response
 
     @app.route("/actors/<int:id>", methods=["DELETE"])
     @requires_auth("delete:actors")
     @swag_from("api_doc/delete_actors.yml")
     def delete_actors(payload, id):
-        actor = Actors.query.get(id)
-        if actor is None:
+        try:
+            deleted = delete_one(Actors, id)
+        except:
+            abort(500)
+
+        if not deleted:
             raise RequestError(
                 {"code": "not_found", "description": "Actor not found"},
                 404,
             )
 
-        try:
-            actor.delete()
-        except:
-            abort(500)
-
         return jsonify({"success": True, "deleted": id})
 
+    @app.route("/actors/export")
+    @requires_auth("read:actors")
+    @swag_from("api_doc/export_actors.yml")
+    def export_actors(payload):
+        fields = validate_fields(Actors, request.args.get("fields"))
+        sortKeys = sort_keys(Actors, ACTORS_SORTABLE)
+        query = filter_actors(project(Actors, fields))
+        return export(order_by_keys(query, sortKeys), Actors, fields)
+
     @app.route("/actors/<int:id>")
     @requires_auth("read:actors")
     @swag_from("api_doc/get_actors_by_id.yml")
     def get_actors_by_id(payload, id):
-        actor = Actors.query.get(id)
+        fields = validate_fields(Actors, request.args.get("fields"))
+        if request.if_none_match:
+            version = get_entity_version(Actors, id)
+            etag = entity_etag(version, fields)
+            if version is not None and is_not_modified(etag):
+                return not_modified(etag)
+
+        actor = get_entity(Actors, id)
         if actor is None:
             raise RequestError(
                 {"code": "not_found", "description": "No such actor found"},
                 404,
             )
-        return jsonify({"success": True, "actor": actor.format()})
+        item = actor["item"]
+        if fields is not None:
+            item = {field: item[field] for field in fields}
+        response = jsonify({"success": True, "actor": item})
+        response.set_etag(entity_etag(actor["version"], fields))
+        return response
+
+    @app.route("/actors/<int:id>/filmography")
+    @requires_auth("read:actors")
+    @swag_from("api_doc/get_actors_filmography.yml")
+    def get_actors_filmography(payload, id):
+        if not exists(Actors, id):
+            raise RequestError(
+                {"code": "not_found", "description": "No such actor found"},
+                404,
+            )
+
+        return jsonify({"success": True, "filmography": load_filmographies([id])[id]})
 
     @app.errorhandler(AuthError)
     def handle_auth_error(error):
@@ -326,6 +569,15 @@ def create_app(database_path=None):
             error.status_code,
         )
 
+    @app.errorhandler(413)
+    def request_entity_too_large(error):
+        return (
+            jsonify(
+                {"success": False, "error": 413, "message": "Request body too large"}
+            ),
+            413,
+        )
+
     @app.errorhandler(500)
     def internal_server_error(error):
         return (
@@ -338,7 +590,18 @@ def create_app(database_path=None):
     return app
 
 
-app = create_app()
+_app = None
+
+
+def __getattr__(name):
+    # Built when a server looks up app:app, importing create_app builds nothing
+    global _app
+    if name != "app":
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    if _app is None:
+        _app = create_app()
+    return _app
+
 
 if __name__ == "__main__":
-    app.run()
+    create_app().run()
@@ -0,0 +1,215 @@
+import os
+import sys
+import asyncio
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+from auth.jwks import get_jwks_store, JWKSError
+from database.pool import pool_sizing
+
+
+def build_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    rootPath = scope.get("root_path", "")
+    path = scope["path"]
+    if rootPath and path.startswith(rootPath):
+        path = path[len(rootPath) :]
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        # WSGI carries the raw bytes of the path as latin-1 strings
+        "SCRIPT_NAME": rootPath.encode("utf8").decode("latin1"),
+        "PATH_INFO": path.encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/{}".format(scope.get("http_version", "1.1")),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if client:
+        environ["REMOTE_ADDR"] = client[0]
+        environ["REMOTE_PORT"] = str(client[1])
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        if key in environ:
+            value = environ[key] + "," + value
+        environ[key] = value
+    return environ
+
+
+class ASGIApp:
+    def __init__(self, wsgi_app, threads=32, max_body_size=None):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        if max_body_size is None and hasattr(wsgi_app, "config"):
+            max_body_size = wsgi_app.config.get("MAX_CONTENT_LENGTH")
+        self.max_body_size = max_body_size
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi")
+        self._jwks_task = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError("Unsupported ASGI scope type {}".format(scope["type"]))
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self):
+        store = get_jwks_store()
+        await self.refresh_jwks(store)
+        self._jwks_task = asyncio.ensure_future(self.keep_jwks_fresh(store))
+
+    async def shutdown(self):
+        if self._jwks_task is not None:
+            self._jwks_task.cancel()
+            self._jwks_task = None
+        self.executor.shutdown(wait=False)
+
+    async def refresh_jwks(self, store):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, store.refresh)
+        except JWKSError:
+            # Requests fetch the keys themselves while Auth0 is unreachable
+            pass
+
+    async def keep_jwks_fresh(self, store):
+        # Refreshed ahead of its expiry, so no request waits on Auth0
+        while True:
+            await asyncio.sleep(max(1, store.ttl - store.min_refresh_interval))
+            await self.refresh_jwks(store)
+
+    def too_large(self, length):
+        return self.max_body_size is not None and length > self.max_body_size
+
+    async def receive_body(self, environ, receive):
+        # The body is limited while it is received, not once it is buffered.
+        # Past the limit the rest is not read, and the app answers 413 from
+        # the length it sees.
+        declared = environ.get("CONTENT_LENGTH", "")
+        if declared.isdigit() and self.too_large(int(declared)):
+            return b"", int(declared)
+
+        chunks = []
+        length = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None, 0
+            chunk = message.get("body", b"")
+            length += len(chunk)
+            if self.too_large(length):
+                return b"", length
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks), length
+
+    async def http(self, scope, receive, send):
+        environ = build_environ(scope, None)
+        body, length = await self.receive_body(environ, receive)
+        if body is None:
+            return
+
+        # A chunked request has no Content-Length, the buffered body has one
+        environ["wsgi.input"] = BytesIO(body)
+        environ["wsgi.input_terminated"] = True
+        environ["CONTENT_LENGTH"] = str(length)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.run_wsgi, environ, send, loop)
+
+    def run_wsgi(self, environ, send, loop):
+        def call(message):
+            # Waiting for each message to be sent holds a streamed export
+            # back to the pace of the client instead of buffering it
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get("started"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in headers
+            ]
+            return write
+
+        def start():
+            if not response.get("started"):
+                response["started"] = True
+                call(
+                    {
+                        "type": "http.response.start",
+                        "status": response["status"],
+                        "headers": response["headers"],
+                    }
+                )
+
+        def write(data):
+            start()
+            call({"type": "http.response.body", "body": data, "more_body": True})
+
+        iterable = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in iterable:
+                if chunk:
+                    write(chunk)
+            start()
+            call({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+
+def asgi_threads():
+    # A thread per connection the pool may open, more would only queue on it
+    if "ASGI_THREADS" in os.environ:
+        return int(os.environ["ASGI_THREADS"])
+    return sum(pool_sizing().values())
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Built when the server looks up asgi:app, not when the adapter is imported
+    global _app
+    if name != "app":
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    if _app is None:
+        from app import app as wsgi_app
+
+        _app = ASGIApp(wsgi_app, threads=asgi_threads())
+    return _app
@@ -2,13 +2,10 @@ import os
 from flask import request
 from flask.json import jsonify
 from functools import wraps
-from dotenv import load_dotenv
-from urllib.request import urlopen
-from icecream import ic
 from jose import jwt
-import json
 
-load_dotenv()
+from auth.jwks import get_jwks_store, JWKSError
+from auth.token_cache import get_token_cache
 
 
 class AuthError(Exception):
@@ -43,12 +40,6 @@ def get_token_auth_header():
 
 
 def verify_decode_jwt(token):
-    # Get JSON web key set (jwks) from Auth0
-    jsonurl = urlopen(
-        "https://{}/.well-known/jwks.json".format(os.environ["AUTH0_DOMAIN"])
-    )
-    jwks = json.loads(jsonurl.read())
-
     try:
         # Read token header
         unverified_header = jwt.get_unverified_header(token)
@@ -71,20 +62,19 @@ def verify_decode_jwt(token):
             401,
         )
 
-    # Find the correct key set
-    rsa_key = {}
-    for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"],
-            }
-            break
-
-    if rsa_key == {}:
+    # Find the correct key from the cached JSON web key set (jwks)
+    try:
+        rsa_key = get_jwks_store().get_key(unverified_header["kid"])
+    except JWKSError:
+        raise AuthError(
+            {
+                "code": "jwks_unavailable",
+                "description": "Unable to fetch the signing keys.",
+            },
+            503,
+        )
+
+    if rsa_key is None:
         raise AuthError(
             {
                 "code": "invalid_header",
@@ -124,6 +114,16 @@ def verify_decode_jwt(token):
         )
 
 
+def decode_token(token):
+    # Repeat bearer tokens skip the signature verification until they expire
+    cache = get_token_cache()
+    payload = cache.get(token)
+    if payload is None:
+        payload = verify_decode_jwt(token)
+        cache.set(token, payload)
+    return payload
+
+
 def check_permissions(permission, payload):
     if "permissions" not in payload:
         raise AuthError(
@@ -151,7 +151,7 @@ def requires_auth(permission=""):
         @wraps(f)
         def wrapper(*args, **kwargs):
             token = get_token_auth_header()
-            payload = verify_decode_jwt(token)
+            payload = decode_token(token)
             check_permissions(permission, payload)
 
             return f(payload, *args, **kwargs)
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import threading
+from urllib.request import urlopen
+from jose import jwk
+
+
+class JWKSError(Exception):
+    pass
+
+
+def get_jwks_url():
+    if "AUTH0_JWKS_URL" in os.environ:
+        return os.environ["AUTH0_JWKS_URL"]
+    return "https://{}/.well-known/jwks.json".format(os.environ["AUTH0_DOMAIN"])
+
+
+class JWKSStore:
+    def __init__(self, url, algorithm, ttl=600, timeout=5, min_refresh_interval=30):
+        self.url = url
+        self.algorithm = algorithm
+        self.ttl = ttl
+        self.timeout = timeout
+        self.min_refresh_interval = min_refresh_interval
+
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def fetch(self):
+        with urlopen(self.url, timeout=self.timeout) as response:
+            jwks = json.loads(response.read())
+
+        keys = {}
+        for key in jwks["keys"]:
+            if key.get("kty") != "RSA" or "kid" not in key:
+                continue
+            rsa_key = {
+                "kty": key["kty"],
+                "kid": key["kid"],
+                "use": key.get("use", "sig"),
+                "n": key["n"],
+                "e": key["e"],
+            }
+            keys[key["kid"]] = jwk.construct(rsa_key, key.get("alg", self.algorithm))
+        return keys
+
+    def is_expired(self):
+        if self._fetched_at is None:
+            return True
+        return time.monotonic() - self._fetched_at >= self.ttl
+
+    def refresh(self, seen_generation=None):
+        with self._lock:
+            # Another thread refreshed while we were waiting for the lock
+            if seen_generation is not None and seen_generation != self._generation:
+                return
+
+            # Do not hammer the provider on unknown kids or while it is down
+            now = time.monotonic()
+            if (
+                self._last_attempt is not None
+                and now - self._last_attempt < self.min_refresh_interval
+                and self._keys
+            ):
+                return
+            self._last_attempt = now
+
+            try:
+                keys = self.fetch()
+            except Exception as e:
+                # Keep serving the stale key set while the provider is down
+                if self._keys:
+                    return
+                raise JWKSError("Unable to fetch JWKS from {}".format(self.url)) from e
+
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._generation += 1
+
+    def get_key(self, kid):
+        generation = self._generation
+        if self.is_expired():
+            self.refresh(generation)
+        elif kid not in self._keys:
+            # Unknown kid usually means the signing key was rotated
+            self.refresh(generation)
+
+        return self._keys.get(kid)
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+            self._last_attempt = None
+            self._generation += 1
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_jwks_store():
+    global _store
+    url = get_jwks_url()
+    if _store is None or _store.url != url:
+        with _store_lock:
+            if _store is None or _store.url != url:
+                _store = JWKSStore(
+                    url,
+                    os.environ["AUTH0_ALGORITHM"],
+                    ttl=int(os.environ.get("JWKS_CACHE_TTL", 600)),
+                    timeout=float(os.environ.get("JWKS_FETCH_TIMEOUT", 5)),
+                    min_refresh_interval=int(
+                        os.environ.get("JWKS_MIN_REFRESH_INTERVAL", 30)
+                    ),
+                )
+    return _store
@@ -0,0 +1,96 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size=1024, enabled=True):
+        self.max_size = max_size
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(token):
+        # Never keep the raw bearer token in memory longer than the request
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        if not self.enabled:
+            return None
+
+        key = self.make_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, token, payload):
+        if not self.enabled or self.max_size <= 0:
+            return
+
+        # Only tokens with an expiry can be cached safely
+        expires_at = payload.get("exp")
+        if type(expires_at) not in (int, float):
+            return
+
+        key = self.make_key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VerifiedTokenCache(
+                    max_size=int(os.environ.get("TOKEN_CACHE_SIZE", 1024)),
+                    enabled=os.environ.get("TOKEN_CACHE_ENABLED", "true").lower()
+                    in ("1", "true", "yes"),
+                )
+    return _cache
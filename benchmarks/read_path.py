@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import datetime
+import tempfile
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db, setup_db
+from database.movies import Movies
+from database.projection import project
+
+
+def best_of(runs, fn):
+    timings = []
+    for _ in range(runs):
+        startTime = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - startTime)
+    return min(timings)
+
+
+def orm_read():
+    db.session.remove()
+    return [item.format() for item in Movies.query.order_by(Movies.id).all()]
+
+
+def projected_read():
+    db.session.remove()
+    return [Movies.format(row) for row in project(Movies).order_by(Movies.id).all()]
+
+
+def main(rows=50000, runs=5):
+    path = tempfile.mktemp(suffix=".db")
+    app = Flask(__name__)
+    with app.app_context():
+        setup_db(app, "sqlite:///" + path)
+        db.session.execute(
+            Movies.__table__.insert(),
+            [
+                {
+                    "title": "Movie {}".format(i),
+                    "release_date": datetime.datetime(2000, 1, 1),
+                }
+                for i in range(rows)
+            ],
+        )
+        db.session.commit()
+
+        assert orm_read() == projected_read()
+        for name, fn in [
+            ("ORM instances", orm_read),
+            ("column projection", projected_read),
+        ]:
+            elapsed = best_of(runs, fn)
+            print("{:<20} {:>10.0f} rows/sec".format(name, rows / elapsed))
+
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import datetime
+import flask
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+
+
+def best_of(runs, loops, fn):
+    timings = []
+    for _ in range(runs):
+        startTime = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - startTime) / loops)
+    return min(timings)
+
+
+def make_page(size):
+    return {
+        "success": True,
+        "movies": [
+            {
+                "id": i,
+                "title": "Movie {}".format(i),
+                "release_date": datetime.datetime(2000 + i % 20, 1, 1),
+                "cast": [
+                    {"id": j, "name": "Actor {}".format(j), "age": 30, "role": "Lead"}
+                    for j in range(3)
+                ],
+            }
+            for i in range(size)
+        ],
+        "page": 1,
+        "next_cursor": "WzEwMF0",
+        "total": 100000,
+        "total_exact": True,
+    }
+
+
+def main(size=100, runs=5, loops=200):
+    app = Flask(__name__)
+    app.json_encoder = serialization.ISOJSONEncoder
+    page = make_page(size)
+
+    def jsonify_with(backend):
+        def fn():
+            app.config["JSON_BACKEND"] = backend
+            return serialization.jsonify(page)
+
+        return fn
+
+    with app.test_request_context():
+        variants = [("flask.jsonify", lambda: flask.jsonify(page))]
+        variants.append(("jsonify (stdlib)", jsonify_with("stdlib")))
+        if serialization.orjson is not None:
+            variants.append(("jsonify (orjson)", jsonify_with("orjson")))
+        else:
+            print("orjson is not installed, skipping it")
+
+        for name, fn in variants:
+            elapsed = best_of(runs, loops, fn)
+            print(
+                "{:<20} {:>8.1f} us per {}-item page {:>8.0f} pages/sec".format(
+                    name, elapsed * 1e6, size, 1 / elapsed
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
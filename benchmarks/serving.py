@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import datetime
+import tempfile
+import rsa
+from jose import jwk, jwt
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+path = tempfile.mktemp(suffix=".db")
+jwksPath = tempfile.mktemp(suffix=".json")
+os.environ.update(
+    {
+        "DATABASE_URL": "sqlite:///" + path,
+        "AUTH0_DOMAIN": "benchmark.test",
+        "AUTH0_IDENTIFIER": "auth",
+        "AUTH0_ALGORITHM": "RS256",
+        "AUTH0_JWKS_URL": "file://" + jwksPath,
+        # Every request should reach the database
+        "ENTITY_CACHE_ENABLED": "false",
+        "RESPONSE_CACHE_ENABLED": "false",
+    }
+)
+
+from app import create_app
+from asgi import ASGIApp
+from database import db
+from database.movies import Movies
+
+
+def make_token():
+    _, privateKey = rsa.newkeys(1024)
+    privatePem = privateKey.save_pkcs1().decode()
+    publicJwk = jwk.construct(privatePem, "RS256").public_key().to_dict()
+    publicJwk.update({"kid": "benchmark", "use": "sig"})
+    with open(jwksPath, "w") as f:
+        json.dump({"keys": [publicJwk]}, f)
+
+    claims = {
+        "iss": "https://benchmark.test/",
+        "aud": "auth",
+        "exp": int(time.time()) + 3600,
+        "permissions": ["read:movies"],
+    }
+    return jwt.encode(
+        claims, privatePem, algorithm="RS256", headers={"kid": "benchmark"}
+    )
+
+
+def simulate_latency(engine, latency):
+    # SQLite answers in microseconds, a Postgres server over the network does not
+    @event.listens_for(engine, "before_cursor_execute")
+    def wait(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency)
+
+
+def sync_worker(app, token, requests):
+    # A sync gunicorn worker serves one request after the other
+    client = app.test_client()
+    for _ in range(requests):
+        res = client.get(
+            "/movies?size=20", headers={"Authorization": "Bearer " + token}
+        )
+        assert res.status_code == 200
+
+
+def asgi_worker(asgiApp, token, requests, concurrency):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/movies",
+        "query_string": b"size=20",
+        "headers": [(b"authorization", "Bearer {}".format(token).encode())],
+    }
+
+    async def request():
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await asgiApp(scope, receive, send)
+        assert statuses == [200]
+
+    async def client(count):
+        for _ in range(count):
+            await request()
+
+    async def clients():
+        await asyncio.gather(
+            *[client(requests // concurrency) for _ in range(concurrency)]
+        )
+
+    asyncio.run(clients())
+
+
+def main(requests=400, concurrency=32, latency=0.002):
+    token = make_token()
+    app = create_app("sqlite:///" + path)
+    with app.app_context():
+        db.session.execute(
+            Movies.__table__.insert(),
+            [
+                {
+                    "title": "Movie {}".format(i),
+                    "release_date": datetime.datetime(2000, 1, 1),
+                }
+                for i in range(1000)
+            ],
+        )
+        db.session.commit()
+        simulate_latency(db.engine, latency)
+
+    print(
+        "{} requests, {} concurrent clients, {:.0f} ms per query".format(
+            requests, concurrency, latency * 1000
+        )
+    )
+    for name, fn in [
+        ("sync worker", lambda: sync_worker(app, token, requests)),
+        (
+            "asgi worker",
+            lambda: asgi_worker(
+                ASGIApp(app, threads=concurrency), token, requests, concurrency
+            ),
+        ),
+    ]:
+        startTime = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - startTime
+        print("{:<20} {:>8.0f} requests/sec".format(name, requests / elapsed))
+
+    os.remove(path)
+    os.remove(jwksPath)
+
+
+if __name__ == "__main__":
+    main()
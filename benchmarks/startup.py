@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import tempfile
+import statistics
+import subprocess
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter, so every phase pays its cold cost
+PHASES = """
+import sys
+import json
+import time
+
+timings = []
+startTime = time.perf_counter()
+
+
+def phase(name):
+    global startTime
+    now = time.perf_counter()
+    timings.append((name, now - startTime))
+    startTime = now
+
+
+sys.path.insert(0, {root!r})
+import app
+
+phase("import app")
+application = app.create_app()
+phase("create_app")
+
+from database import db
+
+db.create_all()
+phase("create_all")
+client = application.test_client()
+client.get("/movies")
+phase("first request")
+client.get("/apispec_1.json")
+phase("first docs request")
+
+import flask_migrate
+
+phase("flask_migrate (CLI only)")
+print(json.dumps(timings))
+"""
+
+
+def run_once(environ):
+    output = subprocess.run(
+        [sys.executable, "-c", PHASES.format(root=ROOT_PATH)],
+        env=environ,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(runs=5):
+    environ = dict(os.environ)
+    path = None
+    if "DATABASE_URL" not in environ:
+        path = tempfile.mktemp(suffix=".db")
+        environ["DATABASE_URL"] = "sqlite:///" + path
+    # create_all is timed as a phase of its own
+    environ["DB_CREATE_ALL"] = "false"
+
+    results = [run_once(environ) for _ in range(runs)]
+    print(
+        "median of {} cold starts against {}".format(
+            runs, environ["DATABASE_URL"].split(":", 1)[0]
+        )
+    )
+    total = 0
+    for index, (name, _) in enumerate(results[0]):
+        elapsed = statistics.median(result[index][1] for result in results)
+        total += elapsed
+        print("{:<26} {:>8.1f} ms".format(name, elapsed * 1000))
+    print("{:<26} {:>8.1f} ms".format("total", total * 1000))
+
+    if path is not None:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from serialization import dumps
+
+
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def clear(self, prefix=""):
+        raise NotImplementedError
+
+    def get_counter(self, key):
+        raise NotImplementedError
+
+    def incr(self, key):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        # Counters live outside the LRU so they are never evicted
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self, prefix=""):
+        with self._lock:
+            if prefix == "":
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, url, namespace="casting-agency:"):
+        # redis is only needed when a shared cache is configured
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, key):
+        value = self.client.get(self.namespace + key)
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            # Entries written by an older worker are treated as misses
+            return None
+
+    def set(self, key, value, ttl):
+        # JSON, not pickle: whoever can write to Redis must not be able to run
+        # code in the workers. Dates come back as the ISO strings they render as.
+        self.client.set(self.namespace + key, dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, *keys):
+        if len(keys) > 0:
+            self.client.delete(*[self.namespace + key for key in keys])
+
+    def clear(self, prefix=""):
+        keys = list(self.client.scan_iter(match=self.namespace + prefix + "*"))
+        if len(keys) > 0:
+            self.client.delete(*keys)
+
+    def get_counter(self, key):
+        return int(self.client.get(self.namespace + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.namespace + key)
+
+    def stats(self):
+        return {"backend": "redis"}
+
+
+def is_shared():
+    url = os.environ.get("CACHE_URL", "")
+    return url.startswith("redis://") or url.startswith("rediss://")
+
+
+def is_fresh_everywhere():
+    # An in-process cache is only invalidated by the writes of its own
+    # worker, the others keep serving what they cached until it expires
+    return is_shared() or int(os.environ.get("WEB_CONCURRENCY", 1)) <= 1
+
+
+def require_shared(setting):
+    if not is_fresh_everywhere():
+        raise RuntimeError(
+            "{} with several workers requires a shared CACHE_URL".format(setting)
+        )
+
+
+def cache_enabled(name):
+    # Off by default when the cache could serve a stale record, and an error
+    # when it is asked for anyway
+    value = os.environ.get(name)
+    if value is None:
+        return is_fresh_everywhere()
+    enabled = value.lower() in ("1", "true", "yes")
+    if enabled:
+        require_shared(name)
+    return enabled
+
+
+def create_backend(max_size):
+    if is_shared():
+        return RedisCacheBackend(os.environ["CACHE_URL"])
+    return MemoryCacheBackend(max_size)
@@ -0,0 +1,118 @@
+import os
+import threading
+
+from cache import create_backend, cache_enabled
+from database import db
+from database.projection import project
+from database.events import on_write
+from database.replicas import may_be_stale
+
+
+class EntityCache:
+    def __init__(self, backend, ttl=300, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tablename, id):
+        return "entity:{}:{}".format(tablename, id)
+
+    def get_or_load(self, tablename, id, load):
+        if not self.enabled:
+            return load()
+
+        key = self.make_key(tablename, id)
+        value = self.backend.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+            generation = self._generations.get(tablename, 0)
+
+        value = load()
+
+        # A write committed while we were reading may have been missed, or
+        # may not have reached the replica we read from yet
+        if (
+            value is not None
+            and self._generations.get(tablename, 0) == generation
+            and not may_be_stale(tablename)
+        ):
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def peek(self, tablename, id):
+        if not self.enabled:
+            return None
+        return self.backend.get(self.make_key(tablename, id))
+
+    def invalidate(self, tablename, ids=None):
+        with self._lock:
+            self._generations[tablename] = self._generations.get(tablename, 0) + 1
+
+        if ids is None:
+            self.backend.clear("entity:{}:".format(tablename))
+        else:
+            self.backend.delete(*[self.make_key(tablename, id) for id in ids])
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests > 0 else 0,
+                **self.backend.stats(),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_entity_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EntityCache(
+                    create_backend(int(os.environ.get("ENTITY_CACHE_SIZE", 10000))),
+                    ttl=int(os.environ.get("ENTITY_CACHE_TTL", 300)),
+                    enabled=cache_enabled("ENTITY_CACHE_ENABLED"),
+                )
+    return _cache
+
+
+@on_write
+def invalidate_entities(tablename, action, ids=None):
+    get_entity_cache().invalidate(tablename, ids)
+
+
+def get_entity(model, id):
+    def load():
+        item = project(model, extra=[model.version]).filter(model.id == id).first()
+        if item is None:
+            return None
+        return {"item": model.format(item), "version": item.version}
+
+    return get_entity_cache().get_or_load(model.__tablename__, id, load)
+
+
+def get_entity_version(model, id):
+    # Answer conditional requests from the cache or a version-only query
+    entity = get_entity_cache().peek(model.__tablename__, id)
+    if entity is not None:
+        return entity["version"]
+    return db.session.query(model.version).filter(model.id == id).scalar()
@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+import threading
+from flask import request
+
+from cache import create_backend, cache_enabled
+from database.events import on_write
+from database.replicas import may_be_stale
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl=60, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def generation_key(tablename):
+        return "generation:{}".format(tablename)
+
+    def make_key(self, tablename, args, permissions, depends_on=()):
+        # Bumping the generation orphans every page of the table at once, a
+        # write to any table the page depends on does the same
+        generations = [
+            self.backend.get_counter(self.generation_key(name))
+            for name in (tablename, *depends_on)
+        ]
+        raw = json.dumps(
+            [tablename, generations, sorted(args), sorted(permissions)],
+            separators=(",", ":"),
+        )
+        return "response:{}:{}".format(
+            tablename, hashlib.sha256(raw.encode()).hexdigest()
+        )
+
+    def get_or_compute(self, tablename, args, permissions, compute, depends_on=()):
+        if not self.enabled:
+            return compute()
+
+        key = self.make_key(tablename, args, permissions, depends_on)
+        body = self.backend.get(key)
+        if body is not None:
+            with self._lock:
+                self.hits += 1
+            return body
+
+        with self._lock:
+            self.misses += 1
+        body = compute()
+
+        # Only keep the page if no write happened while it was computed, or
+        # may still be missing from the replica it was read from
+        if key == self.make_key(
+            tablename, args, permissions, depends_on
+        ) and not may_be_stale(tablename, *depends_on):
+            self.backend.set(key, body, self.ttl)
+        return body
+
+    def invalidate(self, tablename):
+        self.backend.incr(self.generation_key(tablename))
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests > 0 else 0,
+                **self.backend.stats(),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    create_backend(int(os.environ.get("RESPONSE_CACHE_SIZE", 1000))),
+                    ttl=int(os.environ.get("RESPONSE_CACHE_TTL", 60)),
+                    enabled=cache_enabled("RESPONSE_CACHE_ENABLED"),
+                )
+    return _cache
+
+
+@on_write
+def invalidate_responses(tablename, action, ids=None):
+    get_response_cache().invalidate(tablename)
+
+
+def cached_response(tablename, payload, compute, depends_on=()):
+    # Callers with the same permissions share entries, whatever their token
+    return get_response_cache().get_or_compute(
+        tablename,
+        list(request.args.items(multi=True)),
+        payload.get("permissions", []),
+        compute,
+        depends_on,
+    )
@@ -0,0 +1,110 @@
+import gzip
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+compressible = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/csv",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+
+def choose_encoding():
+    accept = request.accept_encodings
+    if brotli is not None and accept["br"] > 0 and accept["br"] >= accept["gzip"]:
+        return "br"
+    if accept["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=current_app.config["COMPRESS_BR_QUALITY"])
+    return gzip.compress(data, compresslevel=current_app.config["COMPRESS_LEVEL"])
+
+
+def compress_chunks(chunks, encoding, level, quality):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=quality)
+        process, flush, finish = (
+            compressor.process,
+            compressor.flush,
+            compressor.finish,
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            # Flushed chunk by chunk, so the client is not kept waiting for
+            # the whole stream to be produced
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def compress_response(response):
+    config = current_app.config
+    if (
+        not config["COMPRESS_ENABLED"]
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.mimetype not in compressible
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    # Small bodies, such as most errors, are not worth the CPU
+    length = response.content_length
+    if length is not None and length < config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    if response.is_streamed or response.direct_passthrough:
+        # Generators and files are compressed as they are sent, never buffered
+        response.response = compress_chunks(
+            response.response,
+            encoding,
+            config["COMPRESS_LEVEL"],
+            config["COMPRESS_BR_QUALITY"],
+        )
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+
+    # The compressed bytes differ, so the ETag can only vouch for the content
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -1,4 +1,5 @@
 from database import db
+from database.events import notify_write
 
 
 class Actors(db.Model):
@@ -7,6 +8,22 @@ class Actors(db.Model):
     name = db.Column(db.String)
     age = db.Column(db.Integer)
     gender = db.Column(db.String)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # The ORM bumps version on every update and refuses to overwrite a newer row
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        # text_pattern_ops lets Postgres serve ?name= prefix matches
+        db.Index(
+            "ix_actors_name_pattern",
+            "name",
+            postgresql_ops={"name": "text_pattern_ops"},
+        ),
+        db.Index("ix_actors_name_id", "name", "id"),
+        db.Index("ix_actors_age_id", "age", "id"),
+        db.Index("ix_actors_gender_age", "gender", "age"),
+    )
 
     def __init__(self, name, age, gender):
         self.name = name
@@ -15,14 +32,21 @@ class Actors(db.Model):
 
     def insert(self):
         db.session.add(self)
+        db.session.flush()
+        id = self.id
         db.session.commit()
+        notify_write(self.__tablename__, "insert", [id])
 
     def update(self):
+        id = self.id
         db.session.commit()
+        notify_write(self.__tablename__, "update", [id])
 
     def delete(self):
+        id = self.id
         db.session.delete(self)
         db.session.commit()
+        notify_write(self.__tablename__, "delete", [id])
 
     def format(self):
         return {
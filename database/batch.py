@@ -0,0 +1,110 @@
+from sqlalchemy import bindparam
+
+from database import db
+from database.events import notify_write
+
+
+def supports_returning():
+    return db.engine.dialect.name == "postgresql"
+
+
+def insert_many(model, records):
+    table = model.__table__
+
+    try:
+        if supports_returning():
+            # One multi-row INSERT ... RETURNING round trip for the whole batch
+            result = db.session.execute(
+                table.insert().values(records).returning(*table.columns)
+            )
+            rows = result.fetchall()
+        else:
+            rows = [model(**record) for record in records]
+            db.session.add_all(rows)
+            db.session.flush()
+
+        # format() only reads attributes, so it works on result rows as well
+        createdItems = [model.format(row) for row in rows]
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+    notify_write(table.name, "insert", [item["id"] for item in createdItems])
+    return createdItems
+
+
+def existing_ids(table, ids):
+    # Only the primary keys are read, no row is loaded into the session
+    rows = db.session.execute(
+        table.select().with_only_columns([table.c.id]).where(table.c.id.in_(ids))
+    )
+    return set(row.id for row in rows)
+
+
+def update_many(model, updates):
+    table = model.__table__
+    ids = [id for id, _ in updates]
+
+    try:
+        found = existing_ids(table, ids)
+
+        # Records changing the same columns share one executemany UPDATE,
+        # collapsed to a single UPDATE ... WHERE id IN when the values match
+        groups = {}
+        for id, fields in updates:
+            if id in found:
+                groups.setdefault(tuple(sorted(fields)), []).append((id, fields))
+
+        for columns, items in groups.items():
+            if all(fields == items[0][1] for _, fields in items):
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id.in_([id for id, _ in items]))
+                    .values(items[0][1], version=table.c.version + 1)
+                )
+            else:
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id == bindparam("_id"))
+                    .values(
+                        {column: bindparam("_" + column) for column in columns},
+                        version=table.c.version + 1,
+                    ),
+                    [
+                        {
+                            "_id": id,
+                            **{"_" + column: fields[column] for column in columns},
+                        }
+                        for id, fields in items
+                    ],
+                )
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+    updatedIds = [id for id in ids if id in found]
+    notify_write(table.name, "update", updatedIds)
+    return updatedIds, [id for id in ids if id not in found]
+
+
+def delete_many(model, ids):
+    table = model.__table__
+    statement = table.delete().where(table.c.id.in_(ids))
+
+    try:
+        if supports_returning():
+            result = db.session.execute(statement.returning(table.c.id))
+            found = set(row.id for row in result)
+        else:
+            found = existing_ids(table, ids)
+            db.session.execute(statement)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+    deletedIds = [id for id in ids if id in found]
+    notify_write(table.name, "delete", deletedIds)
+    return deletedIds, [id for id in ids if id not in found]
@@ -0,0 +1,74 @@
+from database import db
+from database.events import notify_write
+from database.projection import project, format_row
+from database.movies import Movies
+from database.actors import Actors
+
+
+class Castings(db.Model):
+    __tablename__ = "castings"
+    movie_id = db.Column(
+        db.Integer, db.ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True
+    )
+    actor_id = db.Column(
+        db.Integer, db.ForeignKey("actors.id", ondelete="CASCADE"), primary_key=True
+    )
+    role = db.Column(db.String, nullable=False)
+
+    # The primary key serves casts, this index serves filmographies
+    __table_args__ = (db.Index("ix_castings_actor_id", "actor_id"),)
+
+    def __init__(self, movie_id, actor_id, role):
+        self.movie_id = movie_id
+        self.actor_id = actor_id
+        self.role = role
+
+    def insert(self):
+        db.session.add(self)
+        db.session.commit()
+        notify_write(self.__tablename__, "insert", [self.movie_id])
+
+    def delete(self):
+        movie_id = self.movie_id
+        db.session.delete(self)
+        db.session.commit()
+        notify_write(self.__tablename__, "delete", [movie_id])
+
+    def format(self):
+        return {
+            "movie_id": self.movie_id,
+            "actor_id": self.actor_id,
+            "role": self.role,
+        }
+
+    def __repr__(self):
+        return "<Castings: {}, {}, {}>".format(self.movie_id, self.actor_id, self.role)
+
+
+def load_related(key, ids, other, otherKey):
+    # One query for a whole page, whatever its size: the same SELECT ... IN
+    # that selectinload would emit, but returning plain rows
+    related = {id: [] for id in ids}
+    if len(ids) == 0:
+        return related
+
+    rows = (
+        project(other, extra=[key, Castings.role])
+        .join(Castings, otherKey == other.id)
+        .filter(key.in_(ids))
+        .order_by(key, other.id)
+        .all()
+    )
+    for row in rows:
+        related[getattr(row, key.key)].append(
+            {**format_row(other, row), "role": row.role}
+        )
+    return related
+
+
+def load_casts(movieIds):
+    return load_related(Castings.movie_id, movieIds, Actors, Castings.actor_id)
+
+
+def load_filmographies(actorIds):
+    return load_related(Castings.actor_id, actorIds, Movies, Castings.movie_id)
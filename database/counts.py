@@ -0,0 +1,87 @@
+import os
+import hashlib
+import threading
+from flask import current_app
+
+from cache import create_backend
+from database import db
+from database.events import on_write
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_count_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(int(os.environ.get("COUNT_CACHE_SIZE", 1000)))
+    return _backend
+
+
+@on_write
+def invalidate_counts(tablename, action, ids=None):
+    # Updates move rows in and out of filtered totals as well
+    get_count_backend().clear("count:{}:".format(tablename))
+
+
+def clear_counts():
+    get_count_backend().clear("count:")
+
+
+def get_tablename(query):
+    return query.column_descriptions[0]["entity"].__tablename__
+
+
+def exact_count(query):
+    return query.order_by(None).count()
+
+
+def cached_count(query, ttl):
+    statement = query.order_by(None).statement.compile()
+    # Filters are user input, the key only keeps a digest of them
+    digest = hashlib.sha256(
+        repr((str(statement), sorted(statement.params.items()))).encode()
+    ).hexdigest()
+    key = "count:{}:{}".format(get_tablename(query), digest)
+
+    backend = get_count_backend()
+    total = backend.get(key)
+    if total is not None:
+        return total
+
+    total = exact_count(query)
+    backend.set(key, total, ttl)
+    return total
+
+
+def estimated_count(query, threshold):
+    # Planner statistics are only meaningful for a whole, unfiltered table
+    if db.engine.dialect.name != "postgresql" or query.whereclause is not None:
+        return None
+
+    estimate = db.session.execute(
+        "SELECT reltuples::bigint FROM pg_class WHERE relname = :tablename",
+        {"tablename": get_tablename(query)},
+    ).scalar()
+
+    # Small or never analysed tables are cheap enough to count exactly
+    if estimate is None or estimate < threshold:
+        return None
+    return estimate
+
+
+def count_total(query):
+    strategy = current_app.config["COUNT_STRATEGY"]
+
+    if strategy == "estimated":
+        estimate = estimated_count(
+            query, current_app.config["COUNT_ESTIMATE_THRESHOLD"]
+        )
+        if estimate is not None:
+            return estimate, False
+    elif strategy == "cached":
+        return cached_count(query, current_app.config["COUNT_CACHE_TTL"]), True
+
+    return exact_count(query), True
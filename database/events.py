@@ -0,0 +1,12 @@
+_listeners = []
+
+
+def on_write(listener):
+    _listeners.append(listener)
+    return listener
+
+
+def notify_write(tablename, action, ids=None):
+    # Called after a committed insert, update or delete on a table
+    for listener in _listeners:
+        listener(tablename, action, ids)
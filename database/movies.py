@@ -1,4 +1,5 @@
 from database import db
+from database.events import notify_write
 
 
 class Movies(db.Model):
@@ -6,6 +7,21 @@ class Movies(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String)
     release_date = db.Column(db.DateTime(120))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # The ORM bumps version on every update and refuses to overwrite a newer row
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        # text_pattern_ops lets Postgres serve ?title= prefix matches
+        db.Index(
+            "ix_movies_title_pattern",
+            "title",
+            postgresql_ops={"title": "text_pattern_ops"},
+        ),
+        db.Index("ix_movies_title_id", "title", "id"),
+        db.Index("ix_movies_release_date_id", "release_date", "id"),
+    )
 
     def __init__(self, title, release_date):
         self.title = title
@@ -13,14 +29,21 @@ class Movies(db.Model):
 
     def insert(self):
         db.session.add(self)
+        db.session.flush()
+        id = self.id
         db.session.commit()
+        notify_write(self.__tablename__, "insert", [id])
 
     def update(self):
+        id = self.id
         db.session.commit()
+        notify_write(self.__tablename__, "update", [id])
 
     def delete(self):
+        id = self.id
         db.session.delete(self)
         db.session.commit()
+        notify_write(self.__tablename__, "delete", [id])
 
     def format(self):
         return {
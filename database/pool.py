@@ -0,0 +1,128 @@
+import os
+import time
+import threading
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+
+class WaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def clear(self):
+        with self._lock:
+            self.checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_ms_total": round(self.total_wait * 1000, 3),
+                "wait_ms_avg": round(
+                    self.total_wait * 1000 / self.checkouts if self.checkouts else 0, 3
+                ),
+                "wait_ms_max": round(self.max_wait * 1000, 3),
+            }
+
+
+# Shared by the pools an engine recreates after a failover
+wait_stats = WaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        # Time spent waiting for a free connection, or opening a new one
+        startTime = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_stats.record(time.perf_counter() - startTime)
+
+
+def env_int(name, default=None):
+    value = os.environ.get(name)
+    return default if value is None else int(value)
+
+
+def pool_sizing():
+    # The connection budget of the whole service is split between the
+    # gunicorn workers, so that all of them together stay under it. Postgres
+    # accepts 100 connections by default, some are left for migrations,
+    # consoles and other clients.
+    poolSize = env_int("DB_POOL_SIZE")
+    maxOverflow = env_int("DB_MAX_OVERFLOW")
+    maxConnections = env_int("DB_MAX_CONNECTIONS", 60)
+
+    workers = env_int("WEB_CONCURRENCY", 1) * env_int("DB_INSTANCES", 1)
+    perWorker = max(1, maxConnections // max(1, workers))
+
+    # A worker never holds more connections than requests it serves at once,
+    # SQLAlchemy's 5 + 10 when that is not known
+    perWorker = min(perWorker, env_int("GUNICORN_THREADS", 15))
+
+    if poolSize is None:
+        poolSize = perWorker
+    if maxOverflow is None:
+        maxOverflow = max(0, perWorker - poolSize)
+    return {"pool_size": poolSize, "max_overflow": maxOverflow}
+
+
+def engine_options(uri):
+    options = {
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower()
+        in ("1", "true", "yes"),
+    }
+
+    # SQLite files use NullPool, which has no size to configure
+    if not uri.startswith("sqlite"):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_recycle=env_int("DB_POOL_RECYCLE", 1800),
+            pool_timeout=env_int("DB_POOL_TIMEOUT", 30),
+            **pool_sizing(),
+        )
+    return options
+
+
+def set_statement_timeout(engine, timeout):
+    if engine.dialect.name != "postgresql" or timeout <= 0:
+        return
+
+    @event.listens_for(engine, "connect")
+    def on_connect(connection, record):
+        # Every session the pool opens gets the timeout, in milliseconds
+        cursor = connection.cursor()
+        cursor.execute("SET statement_timeout = %s", (timeout,))
+        cursor.close()
+        # A rolled back SET is undone, and the pool rolls back on checkin
+        connection.commit()
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # overflow() counts down from -pool_size until the pool is full
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    stats.update(wait_stats.stats())
+    return stats
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from database import db
+
+
+def format_fields(model):
+    # format() stays the single definition of the output shape, its keys
+    # being the names of the model attributes they are read from
+    blank = SimpleNamespace(**{key: None for key in model.__table__.columns.keys()})
+    return list(model.format(blank))
+
+
+def project(model, fields=None, extra=[]):
+    # Plain rows of the formatted columns: no ORM instances, no identity map.
+    # format() only reads attributes, so model.format(row) works on them.
+    if fields is None:
+        fields = format_fields(model)
+    columns = [getattr(model, field) for field in fields]
+    columns += [column for column in extra if column.key not in fields]
+    return db.session.query(*columns)
+
+
+def format_row(model, row, fields=None):
+    if fields is None:
+        return model.format(row)
+
+    # Sparse fieldset: format() sees None for the columns that were not selected
+    values = dict.fromkeys(format_fields(model))
+    values.update({field: getattr(row, field) for field in fields})
+    item = model.format(SimpleNamespace(**values))
+    return {field: item[field] for field in fields}
@@ -0,0 +1,250 @@
+import os
+import time
+import hashlib
+import threading
+from flask import g, has_request_context, request
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import create_engine
+
+from cache import create_backend, MemoryCacheBackend
+from database.events import on_write
+from database.pool import engine_options, set_statement_timeout, env_int
+
+READ_METHODS = ("GET", "HEAD")
+
+REPLICA_LAG_QUERY = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def measure_lag(engine):
+    # Seconds behind the primary, 0 for databases that cannot tell
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    with engine.connect() as connection:
+        lag = connection.execute(REPLICA_LAG_QUERY).scalar()
+    return float(lag or 0)
+
+
+class Replica:
+    def __init__(self, url, connect_timeout=2):
+        self.url = url
+        options = engine_options(url)
+        if not url.startswith("sqlite"):
+            # An unreachable replica must fail fast, the primary serves its reads
+            options["connect_args"] = {"connect_timeout": connect_timeout}
+        self.engine = create_engine(url, **options)
+        set_statement_timeout(self.engine, env_int("DB_STATEMENT_TIMEOUT", 0))
+        self.healthy = True
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self.checking = False
+
+    def stats(self):
+        return {
+            # Never leak credentials through /stats
+            "url": repr(self.engine.url),
+            "healthy": self.healthy,
+            "lag": self.lag,
+            "error": self.error,
+        }
+
+
+class ReplicaSet:
+    def __init__(
+        self, urls, max_lag=10, check_interval=5, pin_seconds=None, connect_timeout=2
+    ):
+        self.replicas = [Replica(url, connect_timeout) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = max_lag if pin_seconds is None else pin_seconds
+
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+        # Pins and recent writes are shared between workers with CACHE_URL
+        self._backend = create_backend(10000)
+        if (
+            isinstance(self._backend, MemoryCacheBackend)
+            and env_int("WEB_CONCURRENCY", 1) > 1
+        ):
+            # A write on one worker would not pin its client on the others
+            raise RuntimeError(
+                "DATABASE_REPLICA_URLS with several workers requires a shared "
+                "CACHE_URL for read-your-writes"
+            )
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def check(self, replica):
+        try:
+            lag = measure_lag(replica.engine)
+            healthy = lag <= self.max_lag
+            error = None
+        except Exception as e:
+            lag = None
+            healthy = False
+            error = type(e).__name__
+
+        with self._lock:
+            replica.lag = lag
+            replica.error = error
+            replica.healthy = healthy
+            replica.checked_at = time.monotonic()
+            replica.checking = False
+
+    def due(self):
+        # Claims the replicas to check, so a slow one is checked by a single
+        # request while the others keep using its last known state
+        now = time.monotonic()
+        with self._lock:
+            replicas = [
+                replica
+                for replica in self.replicas
+                if not replica.checking
+                and (
+                    replica.checked_at is None
+                    or now - replica.checked_at >= self.check_interval
+                )
+            ]
+            for replica in replicas:
+                replica.checking = True
+        return replicas
+
+    def refresh(self):
+        # Lag is measured over the network, never while holding the lock
+        for replica in self.due():
+            self.check(replica)
+
+    def choose(self, client):
+        # Read your writes: the replicas may not have them yet
+        if self.is_pinned(client):
+            with self._lock:
+                self.primary_reads += 1
+            return None
+
+        self.refresh()
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if len(healthy) == 0:
+                self.primary_reads += 1
+                return None
+            self._next += 1
+            self.replica_reads += 1
+            return healthy[self._next % len(healthy)]
+
+    def pin(self, client):
+        if self.pin_seconds > 0:
+            self._backend.set("pin:{}".format(client), True, self.pin_seconds)
+
+    def is_pinned(self, client):
+        return self._backend.get("pin:{}".format(client)) is not None
+
+    def record_write(self, tablename):
+        self._backend.set("written:{}".format(tablename), True, self.max_lag)
+
+    def recently_written(self, tablename):
+        return self._backend.get("written:{}".format(tablename)) is not None
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "replica_reads": self.replica_reads,
+                "primary_reads": self.primary_reads,
+                "max_lag": self.max_lag,
+                "replicas": [replica.stats() for replica in self.replicas],
+            }
+
+
+_replicas = None
+_replicas_lock = threading.Lock()
+
+
+def get_replica_set():
+    global _replicas
+    urls = [
+        url.strip()
+        for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+    if len(urls) == 0:
+        return None
+
+    if _replicas is None or [replica.url for replica in _replicas.replicas] != urls:
+        with _replicas_lock:
+            if (
+                _replicas is None
+                or [replica.url for replica in _replicas.replicas] != urls
+            ):
+                _replicas = ReplicaSet(
+                    urls,
+                    max_lag=float(os.environ.get("REPLICA_MAX_LAG", 10)),
+                    check_interval=float(os.environ.get("REPLICA_CHECK_INTERVAL", 5)),
+                    pin_seconds=(
+                        float(os.environ["REPLICA_PIN_SECONDS"])
+                        if "REPLICA_PIN_SECONDS" in os.environ
+                        else None
+                    ),
+                    connect_timeout=env_int("REPLICA_CONNECT_TIMEOUT", 2),
+                )
+    return _replicas
+
+
+def client_key():
+    # A client is its bearer token, or its address when it has none
+    credentials = request.headers.get("Authorization") or request.remote_addr or ""
+    return hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def read_replica():
+    # The replica serving this request, None when it must use the primary
+    if not has_request_context() or request.method not in READ_METHODS:
+        return None
+
+    if "read_replica" not in g:
+        replicas = get_replica_set()
+        g.read_replica = None if replicas is None else replicas.choose(client_key())
+    return g.read_replica
+
+
+def may_be_stale(*tablenames):
+    # A replica read of a table written within the lag threshold may miss
+    # that write, so it must not be cached for everyone else
+    replicas = get_replica_set()
+    if replicas is None or read_replica() is None:
+        return False
+    return any(replicas.recently_written(tablename) for tablename in tablenames)
+
+
+def pin_after_write(response):
+    replicas = get_replica_set()
+    if (
+        replicas is not None
+        and request.method not in READ_METHODS + ("OPTIONS",)
+        and response.status_code < 400
+    ):
+        replicas.pin(client_key())
+    return response
+
+
+@on_write
+def record_write(tablename, action, ids=None):
+    replicas = get_replica_set()
+    if replicas is not None:
+        replicas.record_write(tablename)
+
+
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None):
+        # Flushes are writes and always go to the primary
+        if not self._flushing:
+            replica = read_replica()
+            if replica is not None:
+                return replica.engine
+        return super().get_bind(mapper, clause)
@@ -0,0 +1,240 @@
+import html
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import DDL, event, text, bindparam
+
+from database import db
+from database.events import on_write
+from database.movies import Movies
+from database.actors import Actors
+
+# The type reported for each hit, the model and the column that is searched
+searchables = {
+    "movie": (Movies, "title"),
+    "actor": (Actors, "name"),
+}
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+
+def search_table(model):
+    return model.__tablename__ + "_search"
+
+
+def postgres_ddl(model, column):
+    tablename = model.__tablename__
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        # Fuzzy matches ("jurasic") through trigram similarity
+        "CREATE INDEX IF NOT EXISTS ix_{0}_{1}_trgm ON {0} "
+        "USING gin ({1} gin_trgm_ops)".format(tablename, column),
+        # Whole word matches ("de niro") through a text search vector
+        "CREATE INDEX IF NOT EXISTS ix_{0}_{1}_tsv ON {0} "
+        "USING gin (to_tsvector('simple', coalesce({1}, '')))".format(
+            tablename, column
+        ),
+    ]
+
+
+def sqlite_ddl(model, column):
+    # rowid is the record id, so the index can be updated record by record
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5({}, tokenize='trigram')".format(
+            search_table(model), column
+        )
+    ]
+
+
+# Postgres keeps expression indexes current by itself, the SQLite FTS5
+# tables are created next to the models and filled by update_search_index
+for model, column in searchables.values():
+    for statement in postgres_ddl(model, column):
+        event.listen(
+            model.__table__,
+            "after_create",
+            DDL(statement).execute_if(dialect="postgresql"),
+        )
+    for statement in sqlite_ddl(model, column):
+        event.listen(
+            model.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+        )
+    event.listen(
+        model.__table__,
+        "after_drop",
+        DDL("DROP TABLE IF EXISTS {}".format(search_table(model))).execute_if(
+            dialect="sqlite"
+        ),
+    )
+
+
+def uses_fts():
+    return db.engine.dialect.name == "sqlite"
+
+
+def rebuild_search_index(model, column):
+    db.session.execute(text("DELETE FROM {}".format(search_table(model))))
+    db.session.execute(
+        text(
+            "INSERT INTO {0} (rowid, {1}) SELECT id, {1} FROM {2}".format(
+                search_table(model), column, model.__tablename__
+            )
+        )
+    )
+
+
+@on_write
+def update_search_index(tablename, action, ids=None):
+    if not uses_fts():
+        return
+
+    for model, column in searchables.values():
+        if model.__tablename__ != tablename:
+            continue
+
+        try:
+            if ids is None:
+                # Bulk writes do not report ids, index the whole table again
+                rebuild_search_index(model, column)
+            else:
+                db.session.execute(
+                    text(
+                        "DELETE FROM {} WHERE rowid IN :ids".format(search_table(model))
+                    ).bindparams(bindparam("ids", expanding=True)),
+                    {"ids": ids},
+                )
+                if action != "delete":
+                    db.session.execute(
+                        text(
+                            "INSERT INTO {0} (rowid, {1}) SELECT id, {1} FROM {2} "
+                            "WHERE id IN :ids".format(
+                                search_table(model), column, tablename
+                            )
+                        ).bindparams(bindparam("ids", expanding=True)),
+                        {"ids": ids},
+                    )
+            db.session.commit()
+        except:
+            db.session.rollback()
+            raise
+
+
+def trigrams(query):
+    query = query.lower()
+    found = []
+    for index in range(len(query) - 2):
+        trigram = query[index : index + 3]
+        if trigram not in found:
+            found.append(trigram)
+    return found
+
+
+def trigram_match(query):
+    # The trigram tokenizer matches every trigram of a phrase, OR-ing them
+    # instead ranks titles by how many trigrams they share with a typo
+    return " OR ".join(
+        '"{}"'.format(trigram.replace('"', '""')) for trigram in trigrams(query)
+    )
+
+
+def highlight(text, query):
+    # Mark every run of the text covered by a trigram of the query, which
+    # works the same for typos on both databases
+    if text is None:
+        return None
+
+    lowered = text.lower()
+    marked = [False] * len(text)
+    for trigram in trigrams(query):
+        start = lowered.find(trigram)
+        while start != -1:
+            marked[start : start + 3] = [True] * 3
+            start = lowered.find(trigram, start + 1)
+
+    parts = []
+    index = 0
+    while index < len(text):
+        end = index
+        while end < len(text) and marked[end] == marked[index]:
+            end += 1
+        segment = html.escape(text[index:end])
+        if marked[index]:
+            segment = HIGHLIGHT_START + segment + HIGHLIGHT_END
+        parts.append(segment)
+        index = end
+    return "".join(parts)
+
+
+def fts_select(kind, model, column):
+    return (
+        "SELECT '{0}' AS type, rowid AS id, {1} AS text, "
+        "-bm25({2}) AS score "
+        "FROM {2} WHERE {2} MATCH :match".format(kind, column, search_table(model))
+    )
+
+
+def postgres_select(kind, model, column):
+    return (
+        "SELECT '{0}' AS type, id, {1} AS text, "
+        "word_similarity(:query, {1}) + ts_rank(to_tsvector('simple', coalesce({1}, '')), "
+        "plainto_tsquery('simple', :query)) AS score "
+        "FROM {2} WHERE :query <% {1} "
+        "OR to_tsvector('simple', coalesce({1}, '')) @@ plainto_tsquery('simple', :query)".format(
+            kind, column, model.__tablename__
+        )
+    )
+
+
+def search(query, kinds, limit, offset):
+    if uses_fts():
+        select = fts_select
+        params = {"match": trigram_match(query)}
+    else:
+        select = postgres_select
+        params = {"query": query}
+
+    hits = " UNION ALL ".join(
+        select(kind, *searchables[kind]) for kind in searchables if kind in kinds
+    )
+
+    rows = db.session.execute(
+        text(
+            "SELECT type, id, text, score FROM ({}) AS hits "
+            "ORDER BY score DESC, type, id LIMIT :limit OFFSET :offset".format(hits)
+        ),
+        {**params, "limit": limit, "offset": offset},
+    ).fetchall()
+    total = db.session.execute(
+        text("SELECT count(*) FROM ({}) AS hits".format(hits)), params
+    ).scalar()
+
+    results = [
+        {
+            "type": row.type,
+            "id": row.id,
+            "text": row.text,
+            "highlight": highlight(row.text, query),
+            "score": round(float(row.score), 4),
+        }
+        for row in rows
+    ]
+    return results, total
+
+
+@click.command("search-reindex")
+@with_appcontext
+def search_reindex_command():
+    """Rebuild the SQLite full-text search tables from the records."""
+    if not uses_fts():
+        click.echo("Postgres search indexes are maintained by the database.")
+        return
+
+    with db.engine.begin() as connection:
+        for model, column in searchables.values():
+            for statement in sqlite_ddl(model, column):
+                connection.execute(statement)
+
+    for model, column in searchables.values():
+        rebuild_search_index(model, column)
+    db.session.commit()
+    click.echo("Rebuilt the search index of {} tables.".format(len(searchables)))
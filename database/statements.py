@@ -0,0 +1,60 @@
+from database import db
+from database.batch import supports_returning
+from database.events import notify_write
+
+
+def update_one(model, id, fields, versions=None):
+    table = model.__table__
+    statement = (
+        table.update()
+        .where(table.c.id == id)
+        .values(fields, version=table.c.version + 1)
+    )
+    if versions is not None:
+        # Only overwrite a version the client has seen
+        statement = statement.where(table.c.version.in_(versions))
+
+    try:
+        if supports_returning():
+            # UPDATE ... RETURNING: one round trip, no identity map
+            row = db.session.execute(statement.returning(*table.columns)).first()
+        else:
+            result = db.session.execute(statement)
+            row = None
+            if result.rowcount > 0:
+                row = db.session.execute(table.select().where(table.c.id == id)).first()
+
+        item = None if row is None else (model.format(row), row.version)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+    if item is not None:
+        notify_write(table.name, "update", [id])
+    return item
+
+
+def delete_one(model, id):
+    table = model.__table__
+    statement = table.delete().where(table.c.id == id)
+
+    try:
+        if supports_returning():
+            deleted = (
+                db.session.execute(statement.returning(table.c.id)).first() is not None
+            )
+        else:
+            deleted = db.session.execute(statement).rowcount > 0
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+    if deleted:
+        notify_write(table.name, "delete", [id])
+    return deleted
+
+
+def exists(model, id):
+    return db.session.query(model.id).filter(model.id == id).first() is not None
@@ -0,0 +1,4 @@
+class RequestError(Exception):
+    def __init__(self, error, status_code):
+        self.error = error
+        self.status_code = status_code
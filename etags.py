@@ -0,0 +1,55 @@
+import re
+from flask import Response, request
+
+from errors import RequestError
+
+
+def entity_etag(version, fields=None):
+    # Each sparse fieldset is a different representation of the same version
+    if fields is None:
+        return "v{}".format(version)
+    return "v{}-{}".format(version, ".".join(fields))
+
+
+def is_not_modified(etag):
+    # Compressed responses carry a weak ETag, If-None-Match compares weakly
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def if_match_versions():
+    # None when any version may be overwritten, otherwise the versions
+    # the client has seen
+    if not request.if_match or request.if_match.star_tag:
+        return None
+
+    # A version names the record, not the bytes, so the weak ETag of a
+    # compressed response identifies it just as well
+    # The ETag of a sparse fieldset names the same version, "v3-name.age"
+    versions = []
+    for etag in request.if_match.as_set(include_weak=True):
+        match = re.match(r"v(\d+)(?:-|$)", etag)
+        if match is not None:
+            versions.append(int(match.group(1)))
+    return versions
+
+
+def precondition_failed():
+    return RequestError(
+        {
+            "code": "precondition_failed",
+            "description": "The resource was modified by another request",
+        },
+        412,
+    )
+
+
+def conditional_response(response):
+    # List pages have no single version, so their ETag hashes the body
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,85 @@
+import io
+import csv
+from datetime import date
+from flask import Response, current_app, request, stream_with_context
+
+from errors import RequestError
+from serialization import dumps
+from database.projection import format_fields, format_row
+
+formats = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def ndjson_lines(query, model, fields, chunkSize):
+    backend = current_app.config["JSON_BACKEND"]
+    buffer = []
+    for item in query:
+        buffer.append(dumps(format_row(model, item, fields), backend))
+        if len(buffer) >= chunkSize:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if len(buffer) > 0:
+        yield b"\n".join(buffer) + b"\n"
+
+
+def csv_row(item):
+    # Dates as ISO-8601 like the JSON formats, not str()'s "2000-01-01 00:00:00"
+    return {
+        key: value.isoformat() if isinstance(value, date) else value
+        for key, value in item.items()
+    }
+
+
+def csv_lines(query, model, fields, chunkSize):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields or format_fields(model))
+
+    # The header goes out before the query has even started
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
+    for item in query:
+        writer.writerow(csv_row(format_row(model, item, fields)))
+        count += 1
+        if count >= chunkSize:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count > 0:
+        yield buffer.getvalue()
+
+
+def export(query, model, fields=None):
+    exportFormat = request.args.get("format", "ndjson")
+    if exportFormat not in formats:
+        raise RequestError(
+            {
+                "code": "invalid_format",
+                "description": "Export format must be one of {}".format(
+                    ", ".join(formats)
+                ),
+            },
+            400,
+        )
+
+    # Server-side cursor: rows are fetched chunk by chunk as they are streamed
+    chunkSize = current_app.config["EXPORT_CHUNK_SIZE"]
+    query = query.execution_options(stream_results=True).yield_per(chunkSize)
+
+    lines = ndjson_lines if exportFormat == "ndjson" else csv_lines
+    return Response(
+        stream_with_context(lines(query, model, fields, chunkSize)),
+        mimetype=formats[exportFormat],
+        headers={
+            "Content-Disposition": "attachment; filename={}.{}".format(
+                model.__tablename__, exportFormat
+            )
+        },
+    )
@@ -0,0 +1,101 @@
+from datetime import datetime
+from flask import request
+
+from errors import RequestError
+from database.movies import Movies
+from database.actors import Actors
+
+# Every sortable field is backed by a (field, id) index
+MOVIES_SORTABLE = ["id", "title", "release_date"]
+ACTORS_SORTABLE = ["id", "name", "age"]
+
+
+def invalid_filter(name, expected):
+    return RequestError(
+        {
+            "code": "invalid_filter",
+            "description": "{} must be {}".format(name, expected),
+        },
+        400,
+    )
+
+
+def int_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise invalid_filter(name, "an integer")
+
+
+def date_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise invalid_filter(name, "an ISO-8601 date")
+
+
+def starts_with(column, prefix):
+    # Escaped so a prefix containing % or _ is matched literally, and
+    # anchored at the start so a B-tree index can serve it
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(escaped + "%", escape="\\")
+
+
+def filter_movies(query):
+    title = request.args.get("title")
+    releasedAfter = date_arg("released_after")
+    releasedBefore = date_arg("released_before")
+
+    if title is not None:
+        query = query.filter(starts_with(Movies.title, title))
+    if releasedAfter is not None:
+        query = query.filter(Movies.release_date >= releasedAfter)
+    if releasedBefore is not None:
+        query = query.filter(Movies.release_date <= releasedBefore)
+    return query
+
+
+def filter_actors(query):
+    name = request.args.get("name")
+    ageMin = int_arg("age_min")
+    ageMax = int_arg("age_max")
+    gender = request.args.get("gender")
+
+    if name is not None:
+        query = query.filter(starts_with(Actors.name, name))
+    if ageMin is not None:
+        query = query.filter(Actors.age >= ageMin)
+    if ageMax is not None:
+        query = query.filter(Actors.age <= ageMax)
+    if gender is not None:
+        query = query.filter(Actors.gender == gender)
+    return query
+
+
+def sort_keys(model, sortable):
+    # ?sort=age for ascending, ?sort=-age for descending; id breaks ties
+    sort = request.args.get("sort", "id")
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+
+    if field not in sortable:
+        raise RequestError(
+            {
+                "code": "invalid_sort",
+                "description": "Sort must be one of {}, optionally prefixed by -".format(
+                    ", ".join(sortable)
+                ),
+            },
+            400,
+        )
+
+    keys = [(getattr(model, field), descending)]
+    if field != "id":
+        keys.append((model.id, False))
+    return keys
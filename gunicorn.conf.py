@@ -0,0 +1,93 @@
+import os
+import math
+import multiprocessing
+
+
+def env_bool(name, default):
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+def read_cgroup(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cpu_count():
+    # The CPUs this process may run on, not those of the host
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = multiprocessing.cpu_count()
+
+    # Containers are usually limited by a CFS quota instead, cgroup v2 or v1
+    quota = read_cgroup("/sys/fs/cgroup/cpu.max")
+    if quota is None:
+        quota = read_cgroup("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = read_cgroup("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota is not None and period is not None:
+            quota = quota + period
+    if quota is not None and len(quota) == 2 and quota[0] not in ("max", "-1"):
+        count = min(count, max(1, math.ceil(int(quota[0]) / int(quota[1]))))
+    return count
+
+
+def default_workers(worker_class, threads):
+    # Sync workers wait on I/O one request at a time, so there are more of
+    # them than CPUs; threaded and gevent workers already overlap their I/O
+    if worker_class == "sync" and threads <= 1:
+        return cpu_count() * 2 + 1
+    return cpu_count()
+
+
+bind = "0.0.0.0:{}".format(os.environ.get("PORT", 8000))
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+workers = int(os.environ.get("WEB_CONCURRENCY", default_workers(worker_class, threads)))
+
+# The pools split DB_MAX_CONNECTIONS between the workers and hold no more
+# connections than a worker has threads, see database/pool.py
+os.environ["WEB_CONCURRENCY"] = str(workers)
+if worker_class == "gevent":
+    os.environ.pop("GUNICORN_THREADS", None)
+else:
+    os.environ["GUNICORN_THREADS"] = str(threads)
+
+# Workers are forked from a master that imported the app once
+preload_app = env_bool("GUNICORN_PRELOAD", "true")
+
+# Workers are replaced after a number of requests to bound their memory,
+# the jitter keeps them from all restarting at the same time
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(
+    os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+)
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+
+
+def pre_fork(server, arbiter_worker):
+    # Connections the master opened while loading the app, e.g. for
+    # create_all, are closed before forking: a worker closing an inherited
+    # connection would also close it under its siblings
+    if preload_app:
+        from database import dispose_engines
+
+        dispose_engines()
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning("psycogreen is not installed, queries block gevent")
+        else:
+            patch_psycopg()
@@ -0,0 +1,188 @@
+import io
+import os
+import csv
+import json
+import time
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+
+from database import db
+from database.events import notify_write
+from database.movies import Movies
+from database.actors import Actors
+from errors import RequestError
+from validation import validate_new_movies, validate_new_actor
+
+
+def parse_date(value):
+    # ISO-8601, or MM/DD/YYYY as Postgres reads the dates sent to the API
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, "%m/%d/%Y")
+    except ValueError:
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid release date"},
+            400,
+        )
+
+
+def validate_import_movies(record):
+    # A bad date is rejected with its record instead of failing the batch
+    movie = validate_new_movies(record)
+    movie["release_date"] = parse_date(movie["release_date"])
+    return movie
+
+
+resources = {
+    "movies": (Movies, validate_import_movies),
+    "actors": (Actors, validate_new_actor),
+}
+
+
+def read_records(path, fileFormat):
+    with open(path, newline="") as f:
+        if fileFormat == "csv":
+            for record in csv.DictReader(f):
+                # CSV has no types, so numeric columns are converted here
+                if record.get("age", "").strip().lstrip("-").isdigit():
+                    record["age"] = int(record["age"])
+                yield record
+        else:
+            for line in f:
+                if line.strip() == "":
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+
+def copy_rows(table, columns, rows):
+    buffer = io.StringIO()
+    # COPY loads an unquoted empty field as NULL, so strings are always
+    # quoted to keep "" an empty string
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+            table.name, ", ".join(columns)
+        ),
+        buffer,
+    )
+
+
+def insert_rows(table, columns, rows):
+    if db.engine.dialect.name == "postgresql":
+        copy_rows(table, columns, rows)
+    else:
+        db.session.execute(table.insert(), rows)
+
+
+def read_progress(progressPath):
+    if not os.path.exists(progressPath):
+        return 0
+    with open(progressPath) as f:
+        return int(f.read().strip() or 0)
+
+
+def write_progress(progressPath, processed):
+    with open(progressPath, "w") as f:
+        f.write(str(processed))
+
+
+def commit_rows(table, rows, progressPath, processed):
+    if len(rows) > 0:
+        insert_rows(table, list(rows[0]), rows)
+        db.session.commit()
+    # Progress is only recorded once the chunk is committed
+    write_progress(progressPath, processed)
+
+
+def import_records(resource, path, fileFormat, batchSize, rejectsPath, resume):
+    model, validate = resources[resource]
+    table = model.__table__
+
+    progressPath = path + ".progress"
+    skip = read_progress(progressPath) if resume else 0
+
+    processed = skip
+    imported = 0
+    rejected = 0
+    rows = []
+    startTime = time.monotonic()
+
+    with open(rejectsPath, "a" if resume else "w") as rejects:
+        for index, record in enumerate(read_records(path, fileFormat)):
+            if index < skip:
+                continue
+
+            try:
+                rows.append(validate(record))
+                imported += 1
+            except RequestError as e:
+                rejected += 1
+                rejects.write(
+                    json.dumps({"record": index + 1, "data": record, **e.error}) + "\n"
+                )
+            processed = index + 1
+
+            if len(rows) >= batchSize:
+                commit_rows(table, rows, progressPath, processed)
+                rows = []
+
+        commit_rows(table, rows, progressPath, processed)
+
+    notify_write(table.name, "insert")
+    return imported, rejected, time.monotonic() - startTime
+
+
+@click.command("import-data")
+@click.argument("resource", type=click.Choice(list(resources)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "fileFormat",
+    type=click.Choice(["csv", "ndjson"]),
+    help="Input format, guessed from the file extension by default.",
+)
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option(
+    "--rejects",
+    "rejectsPath",
+    help="Where invalid records are written, PATH.rejects.ndjson by default.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip the records committed by a previous, interrupted import.",
+)
+@with_appcontext
+def import_data_command(resource, path, fileFormat, batch_size, rejectsPath, resume):
+    """Bulk import movies or actors from a CSV or NDJSON file."""
+    if fileFormat is None:
+        fileFormat = "csv" if path.lower().endswith(".csv") else "ndjson"
+    if rejectsPath is None:
+        rejectsPath = path + ".rejects.ndjson"
+
+    imported, rejected, elapsed = import_records(
+        resource, path, fileFormat, batch_size, rejectsPath, resume
+    )
+    click.echo(
+        "Imported {} {}, rejected {} in {:.2f}s ({:.0f} rows/sec)".format(
+            imported,
+            resource,
+            rejected,
+            elapsed,
+            imported / elapsed if elapsed > 0 else 0,
+        )
+    )
+    if rejected > 0:
+        click.echo("Rejected records written to {}".format(rejectsPath))
@@ -0,0 +1,47 @@
+"""add castings
+
+Revision ID: 5b9e8c2d7f03
+Revises: e7a3d5b28f64
+Create Date: 2026-10-18 13:41:52.904518
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5b9e8c2d7f03"
+down_revision = "e7a3d5b28f64"
+branch_labels = None
+depends_on = None
+
+
+def has_table(table):
+    return table in sa.inspect(op.get_bind()).get_table_names()
+
+
+def has_index(table, index):
+    inspector = sa.inspect(op.get_bind())
+    return index in [info["name"] for info in inspector.get_indexes(table)]
+
+
+def upgrade():
+    # Workers running create_all may have created the table and its index
+    # before the database was migrated
+    if not has_table("castings"):
+        op.create_table(
+            "castings",
+            sa.Column("movie_id", sa.Integer(), nullable=False),
+            sa.Column("actor_id", sa.Integer(), nullable=False),
+            sa.Column("role", sa.String(), nullable=False),
+            sa.ForeignKeyConstraint(["actor_id"], ["actors.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["movie_id"], ["movies.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("movie_id", "actor_id"),
+        )
+    if not has_index("castings", "ix_castings_actor_id"):
+        op.create_index("ix_castings_actor_id", "castings", ["actor_id"])
+
+
+def downgrade():
+    op.drop_index("ix_castings_actor_id", table_name="castings")
+    op.drop_table("castings")
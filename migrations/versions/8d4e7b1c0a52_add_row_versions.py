@@ -0,0 +1,40 @@
+"""add row versions
+
+Revision ID: 8d4e7b1c0a52
+Revises: 3f1c2a9e4b10
+Create Date: 2026-10-18 09:14:07.118964
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8d4e7b1c0a52"
+down_revision = "3f1c2a9e4b10"
+branch_labels = None
+depends_on = None
+
+
+def has_column(table, column):
+    inspector = sa.inspect(op.get_bind())
+    return column in [info["name"] for info in inspector.get_columns(table)]
+
+
+def upgrade():
+    # create_all already added the column to tables it created, and not to
+    # tables that existed before the row versions
+    for table in ["movies", "actors"]:
+        if has_column(table, "version"):
+            continue
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(
+                sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+            )
+
+
+def downgrade():
+    with op.batch_alter_table("actors") as batch_op:
+        batch_op.drop_column("version")
+    with op.batch_alter_table("movies") as batch_op:
+        batch_op.drop_column("version")
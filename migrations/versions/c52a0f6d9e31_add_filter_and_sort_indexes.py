@@ -0,0 +1,56 @@
+"""add filter and sort indexes
+
+Revision ID: c52a0f6d9e31
+Revises: 8d4e7b1c0a52
+Create Date: 2026-10-18 09:20:33.742095
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c52a0f6d9e31"
+down_revision = "8d4e7b1c0a52"
+branch_labels = None
+depends_on = None
+
+
+def create_index(name, table, columns, **kwargs):
+    # Workers running create_all may have created the index before the
+    # database was migrated
+    inspector = sa.inspect(op.get_bind())
+    if name not in [info["name"] for info in inspector.get_indexes(table)]:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def upgrade():
+    create_index(
+        "ix_movies_title_pattern",
+        "movies",
+        ["title"],
+        postgresql_ops={"title": "text_pattern_ops"},
+    )
+    create_index("ix_movies_title_id", "movies", ["title", "id"])
+    create_index("ix_movies_release_date_id", "movies", ["release_date", "id"])
+
+    create_index(
+        "ix_actors_name_pattern",
+        "actors",
+        ["name"],
+        postgresql_ops={"name": "text_pattern_ops"},
+    )
+    create_index("ix_actors_name_id", "actors", ["name", "id"])
+    create_index("ix_actors_age_id", "actors", ["age", "id"])
+    create_index("ix_actors_gender_age", "actors", ["gender", "age"])
+
+
+def downgrade():
+    op.drop_index("ix_actors_gender_age", table_name="actors")
+    op.drop_index("ix_actors_age_id", table_name="actors")
+    op.drop_index("ix_actors_name_id", table_name="actors")
+    op.drop_index("ix_actors_name_pattern", table_name="actors")
+
+    op.drop_index("ix_movies_release_date_id", table_name="movies")
+    op.drop_index("ix_movies_title_id", table_name="movies")
+    op.drop_index("ix_movies_title_pattern", table_name="movies")
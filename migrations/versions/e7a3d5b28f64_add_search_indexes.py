@@ -0,0 +1,44 @@
+"""add search indexes
+
+Revision ID: e7a3d5b28f64
+Revises: c52a0f6d9e31
+Create Date: 2026-10-18 11:02:15.287340
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from database.search import searchables, search_table, postgres_ddl, sqlite_ddl
+
+# revision identifiers, used by Alembic.
+revision = "e7a3d5b28f64"
+down_revision = "c52a0f6d9e31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for model, column in searchables.values():
+        if dialect == "postgresql":
+            for statement in postgres_ddl(model, column):
+                op.execute(statement)
+        elif dialect == "sqlite":
+            for statement in sqlite_ddl(model, column):
+                op.execute(statement)
+            op.execute(
+                "INSERT INTO {0} (rowid, {1}) SELECT id, {1} FROM {2}".format(
+                    search_table(model), column, model.__tablename__
+                )
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for model, column in searchables.values():
+        if dialect == "postgresql":
+            op.drop_index("ix_{}_{}_tsv".format(model.__tablename__, column))
+            op.drop_index("ix_{}_{}_trgm".format(model.__tablename__, column))
+        elif dialect == "sqlite":
+            op.execute("DROP TABLE IF EXISTS {}".format(search_table(model)))
@@ -0,0 +1,136 @@
+import json
+import base64
+from datetime import datetime
+from flask import request, current_app
+from sqlalchemy import DateTime, and_, or_, false
+
+from errors import RequestError
+from database.counts import count_total
+from database.projection import format_row
+
+
+def encode_cursor(values):
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ],
+        separators=(",", ":"),
+    ).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if type(values) is not list or len(values) != len(sort_keys):
+            raise ValueError()
+
+        # JSON has no dates, so they travel as ISO-8601 strings
+        for index, (column, _) in enumerate(sort_keys):
+            if values[index] is None:
+                continue
+            if isinstance(column.type, DateTime):
+                values[index] = datetime.fromisoformat(values[index])
+            # A value of another type would fail in the database instead
+            if type(values[index]) is not column.type.python_type:
+                raise ValueError()
+    except Exception:
+        raise RequestError(
+            {"code": "invalid_cursor", "description": "The cursor is not valid"},
+            400,
+        )
+    return values
+
+
+def is_nullable(column):
+    return getattr(column.expression, "nullable", True)
+
+
+def seek_condition(sort_keys, values):
+    # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y), honouring each
+    # direction. NULLs are sorted last, after every other value.
+    conditions = []
+    for index, (column, descending) in enumerate(sort_keys):
+        value = values[index]
+        if value is None:
+            comparison = false()
+        else:
+            comparison = column < value if descending else column > value
+            if is_nullable(column):
+                comparison = or_(comparison, column.is_(None))
+
+        equalities = [
+            (
+                sort_keys[i][0].is_(None)
+                if values[i] is None
+                else sort_keys[i][0] == values[i]
+            )
+            for i in range(index)
+        ]
+        conditions.append(and_(*equalities, comparison))
+    return or_(*conditions)
+
+
+def order_by_keys(query, sort_keys):
+    clauses = []
+    for column, descending in sort_keys:
+        clause = column.desc() if descending else column.asc()
+        if is_nullable(column):
+            clause = clause.nullslast()
+        clauses.append(clause)
+    return query.order_by(*clauses)
+
+
+def page_args():
+    page = request.args.get("page", 1, type=int)
+    size = request.args.get("size", 10, type=int)
+
+    if page < 1 or size < 1:
+        raise RequestError(
+            {
+                "code": "invalid_page",
+                "description": "Page and size must be positive integers",
+            },
+            400,
+        )
+    return page, min(size, current_app.config["MAX_PAGE_SIZE"])
+
+
+def paginate(query, sort_keys, model, fields=None):
+    page, size = page_args()
+    cursor = request.args.get("cursor")
+
+    ordered = order_by_keys(query, sort_keys)
+    if cursor is None:
+        # Page mode: LIMIT/OFFSET, an empty page is an error
+        itemsList = ordered.limit(size).offset((page - 1) * size).all()
+        if len(itemsList) == 0:
+            raise RequestError(
+                {
+                    "code": "resource_not_found",
+                    "description": "The requested page does not contain any record",
+                },
+                404,
+            )
+        pageInfo = {"page": page}
+    else:
+        # Cursor mode: seek past the last seen sort key, an empty cursor starts over
+        if cursor != "":
+            values = decode_cursor(cursor, sort_keys)
+            ordered = ordered.filter(seek_condition(sort_keys, values))
+        itemsList = ordered.limit(size).all()
+        pageInfo = {"cursor": cursor}
+
+    nextCursor = None
+    if len(itemsList) == size:
+        lastItem = itemsList[-1]
+        nextCursor = encode_cursor(
+            [getattr(lastItem, column.key) for column, _ in sort_keys]
+        )
+
+    selectedItems = [format_row(model, item, fields) for item in itemsList]
+    pageInfo["next_cursor"] = nextCursor
+    pageInfo["total"], pageInfo["total_exact"] = count_total(query)
+    return selectedItems, pageInfo
@@ -3,4 +3,4 @@ export AUTH0_DOMAIN="franknguyenvd.au.auth0.com"
 export AUTH0_CLIENT_ID="oonR1Vxx6bPjJakLOwWqHixQJ5cisSjG"
 export AUTH0_IDENTIFIER="auth"
 export AUTH0_ALGORITHM="RS256"
-gunicorn app:app
\ No newline at end of file
+gunicorn --config gunicorn.conf.py app:app
\ No newline at end of file
@@ -0,0 +1,62 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import current_app
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(value).__name__)
+    )
+
+
+class ISOJSONEncoder(JSONEncoder):
+    # Flask renders datetimes as RFC 1123 (http_date), the API uses ISO-8601
+    def default(self, value):
+        if isinstance(value, (datetime, date, Decimal)):
+            return default(value)
+        return super().default(value)
+
+
+def dumps(obj, backend="orjson", indent=False):
+    # orjson is optional, the standard library produces the same output
+    if backend == "orjson" and orjson is not None:
+        # orjson writes naive datetimes as ISO-8601 itself, like isoformat()
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return json.dumps(
+        obj,
+        default=default,
+        # orjson writes UTF-8 as is, \uXXXX escapes would change the bytes
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    ).encode()
+
+
+def jsonify(*args, **kwargs):
+    if args and kwargs:
+        raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+    elif len(args) == 1:
+        data = args[0]
+    else:
+        data = args or kwargs
+
+    indent = current_app.config["JSONIFY_PRETTYPRINT_REGULAR"] or current_app.debug
+    return current_app.response_class(
+        dumps(data, current_app.config["JSON_BACKEND"], indent) + b"\n",
+        mimetype=current_app.config["JSONIFY_MIMETYPE"],
+    )
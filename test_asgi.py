@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import asyncio
+import unittest
+from http import HTTPStatus
+from flask import Flask, Response, request, jsonify, abort
+from werkzeug.test import Client
+
+from asgi import ASGIApp, build_environ
+from auth.jwks import get_jwks_store
+from test_auth import LocalJWKS, make_signing_key
+
+
+def as_wsgi(asgiApp):
+    # Drives the ASGI app from a WSGI caller, such as the Werkzeug test client
+    def wsgi_app(environ, start_response):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": environ["SERVER_PROTOCOL"].split("/", 1)[1],
+            "method": environ["REQUEST_METHOD"],
+            "scheme": environ["wsgi.url_scheme"],
+            "path": environ["PATH_INFO"].encode("latin1").decode("utf8"),
+            "query_string": environ.get("QUERY_STRING", "").encode("latin1"),
+            "root_path": environ.get("SCRIPT_NAME", ""),
+            "headers": [
+                (key[5:].replace("_", "-").lower().encode(), value.encode("latin1"))
+                for key, value in environ.items()
+                if key.startswith("HTTP_")
+                and key not in ("HTTP_CONTENT_TYPE", "HTTP_CONTENT_LENGTH")
+            ]
+            + [
+                (name.encode(), environ[key].encode("latin1"))
+                for key, name in [
+                    ("CONTENT_TYPE", "content-type"),
+                    ("CONTENT_LENGTH", "content-length"),
+                ]
+                if environ.get(key)
+            ],
+            "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+            "client": (environ.get("REMOTE_ADDR", "127.0.0.1"), 0),
+        }
+        body = environ["wsgi.input"].read()
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(asgiApp(scope, receive, send))
+        status = messages[0]["status"]
+        start_response(
+            "{} {}".format(status, HTTPStatus(status).phrase),
+            [
+                (name.decode("latin1"), value.decode("latin1"))
+                for name, value in messages[0]["headers"]
+            ],
+        )
+        return [message.get("body", b"") for message in messages[1:]]
+
+    return wsgi_app
+
+
+def asgi_client(app):
+    return Client(as_wsgi(ASGIApp(app, threads=4)), app.response_class)
+
+
+def create_test_app():
+    app = Flask(__name__)
+
+    @app.route("/echo/<name>", methods=["GET", "POST"])
+    def echo(name):
+        return jsonify(
+            {
+                "method": request.method,
+                "name": name,
+                "args": request.args.to_dict(flat=False),
+                "json": request.get_json(silent=True),
+                "header": request.headers.get("X-Test"),
+                "remote_addr": request.remote_addr,
+            }
+        )
+
+    @app.route("/stream")
+    def stream():
+        return Response(
+            ("chunk {}\n".format(i) for i in range(3)), mimetype="text/plain"
+        )
+
+    @app.route("/length", methods=["POST"])
+    def length():
+        # As app.py does for JSON bodies
+        if request.content_length > app.config["MAX_CONTENT_LENGTH"]:
+            abort(413)
+        return jsonify(
+            {"length": request.content_length, "body": request.data.decode()}
+        )
+
+    @app.route("/slow")
+    def slow():
+        time.sleep(0.2)
+        return "done"
+
+    return app
+
+
+def send_chunks(asgiApp, path, chunks):
+    # A chunked request: the body arrives in parts, without a Content-Length
+    messages = []
+    received = []
+
+    async def receive():
+        received.append(chunks[len(received)])
+        return {
+            "type": "http.request",
+            "body": received[-1],
+            "more_body": len(received) < len(chunks),
+        }
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+    asyncio.run(asgiApp(scope, receive, send))
+    return messages, len(received)
+
+
+def run_lifespan(asgiApp, messages):
+    sent = []
+    queue = list(messages)
+
+    async def receive():
+        return {"type": queue.pop(0)}
+
+    async def send(message):
+        sent.append(message["type"])
+
+    async def lifespan():
+        await asgiApp({"type": "lifespan"}, receive, send)
+
+    asyncio.run(lifespan())
+    return sent
+
+
+class ASGIAppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app()
+        self.asgiApp = ASGIApp(self.app, threads=8)
+        self.client = Client(as_wsgi(self.asgiApp), self.app.response_class)
+
+    def test_request_reaches_wsgi_app(self):
+        res = self.client.post(
+            "/echo/caf%C3%A9?page=1&page=2",
+            json={"title": "Matrix"},
+            headers={"X-Test": "yes"},
+        )
+        data = res.get_json()
+
+        assert res.status_code == 200
+        assert data["method"] == "POST"
+        assert data["name"] == "café"
+        assert data["args"] == {"page": ["1", "2"]}
+        assert data["json"] == {"title": "Matrix"}
+        assert data["header"] == "yes"
+
+    def test_streamed_response_is_sent_in_chunks(self):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/stream", "headers": []}
+        asyncio.run(self.asgiApp(scope, receive, send))
+
+        assert messages[0]["status"] == 200
+        bodies = [message["body"] for message in messages[1:]]
+        assert bodies == [b"chunk 0\n", b"chunk 1\n", b"chunk 2\n", b""]
+        assert messages[-1]["more_body"] is False
+
+    def test_not_found(self):
+        res = self.client.get("/missing")
+        assert res.status_code == 404
+
+    def test_requests_are_served_concurrently(self):
+        async def request():
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {"type": "http", "method": "GET", "path": "/slow", "headers": []}
+            await self.asgiApp(scope, receive, send)
+            return messages[0]["status"]
+
+        async def requests():
+            return await asyncio.gather(*[request() for _ in range(8)])
+
+        startTime = time.perf_counter()
+        statuses = asyncio.run(requests())
+        elapsed = time.perf_counter() - startTime
+
+        assert statuses == [200] * 8
+        assert elapsed < 0.2 * 4
+
+    def test_chunked_body_reaches_wsgi_app(self):
+        self.app.config["MAX_CONTENT_LENGTH"] = 1024
+        messages, _ = send_chunks(
+            ASGIApp(self.app, threads=2), "/length", [b"abc", b"def", b"gh"]
+        )
+
+        assert messages[0]["status"] == 200
+        assert json.loads(messages[1]["body"]) == {"length": 8, "body": "abcdefgh"}
+
+    def test_body_is_limited_while_received(self):
+        self.app.config["MAX_CONTENT_LENGTH"] = 5
+        messages, received = send_chunks(
+            ASGIApp(self.app, threads=2), "/length", [b"abc", b"def", b"gh"]
+        )
+
+        assert messages[0]["status"] == 413
+        assert received == 2
+
+    def test_headers_are_joined(self):
+        environ = build_environ(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/echo/a",
+                "headers": [(b"accept", b"text/plain"), (b"accept", b"text/csv")],
+                "client": ("10.0.0.1", 5000),
+            },
+            None,
+        )
+        assert environ["HTTP_ACCEPT"] == "text/plain,text/csv"
+        assert environ["REMOTE_ADDR"] == "10.0.0.1"
+
+
+class LifespanTestCase(unittest.TestCase):
+    def setUp(self):
+        _, public_jwk = make_signing_key("key-1")
+        self.jwks = LocalJWKS([public_jwk])
+        self.environ = dict(os.environ)
+        os.environ["AUTH0_JWKS_URL"] = self.jwks.url
+        os.environ["AUTH0_ALGORITHM"] = "RS256"
+
+    def tearDown(self):
+        self.jwks.remove()
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def test_startup_fetches_signing_keys(self):
+        sent = run_lifespan(
+            ASGIApp(create_test_app(), threads=2),
+            ["lifespan.startup", "lifespan.shutdown"],
+        )
+
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert not get_jwks_store().is_expired()
+        assert "key-1" in get_jwks_store()._keys
+
+    def test_startup_survives_unreachable_provider(self):
+        self.jwks.remove()
+        get_jwks_store().clear()
+
+        sent = run_lifespan(
+            ASGIApp(create_test_app(), threads=2),
+            ["lifespan.startup", "lifespan.shutdown"],
+        )
+
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert get_jwks_store().is_expired()
+
+
+if __name__ == "__main__":
+    unittest.main()
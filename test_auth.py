@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+import rsa
+from jose import jwk, jwt
+
+from auth import verify_decode_jwt, decode_token, AuthError
+from auth.jwks import JWKSStore, JWKSError, get_jwks_store
+from auth.token_cache import VerifiedTokenCache, get_token_cache
+
+issuer_domain = "casting-agency.test"
+audience = "auth"
+
+
+def make_signing_key(kid):
+    _, private_key = rsa.newkeys(1024)
+    private_pem = private_key.save_pkcs1().decode()
+    public_jwk = jwk.construct(private_pem, "RS256").public_key().to_dict()
+    public_jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return private_pem, public_jwk
+
+
+def make_token(private_pem, kid, permissions=[], expires_in=3600):
+    claims = {
+        "iss": "https://{}/".format(issuer_domain),
+        "aud": audience,
+        "sub": "auth0|tester",
+        "exp": int(time.time()) + expires_in,
+        "permissions": permissions,
+    }
+    return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": kid})
+
+
+class LocalJWKS:
+    def __init__(self, keys):
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        self.url = "file://" + self.path
+        self.publish(keys)
+
+    def publish(self, keys):
+        with open(self.path, "w") as f:
+            json.dump({"keys": keys}, f)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CountingJWKSStore(JWKSStore):
+    fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return super().fetch()
+
+
+class JWKSStoreTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_pem, cls.public_jwk = make_signing_key("key-1")
+        cls.rotated_pem, cls.rotated_jwk = make_signing_key("key-2")
+
+    def setUp(self):
+        self.jwks = LocalJWKS([self.public_jwk])
+        self.store = CountingJWKSStore(
+            self.jwks.url, "RS256", ttl=600, timeout=1, min_refresh_interval=0
+        )
+
+    def tearDown(self):
+        self.jwks.remove()
+
+    def test_keys_are_fetched_once_within_ttl(self):
+        for _ in range(5):
+            assert self.store.get_key("key-1") is not None
+        assert self.store.fetches == 1
+
+    def test_refetch_after_ttl_expiry(self):
+        self.store.ttl = 0
+        self.store.get_key("key-1")
+        self.store.get_key("key-1")
+        assert self.store.fetches == 2
+
+    def test_refetch_on_unknown_kid(self):
+        self.store.get_key("key-1")
+        self.jwks.publish([self.public_jwk, self.rotated_jwk])
+        assert self.store.get_key("key-2") is not None
+        assert self.store.fetches == 2
+
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        self.store.min_refresh_interval = 60
+        self.store.get_key("key-1")
+        assert self.store.get_key("missing") is None
+        assert self.store.get_key("missing") is None
+        assert self.store.fetches == 1
+
+    def test_stale_keys_served_while_provider_down(self):
+        self.store.get_key("key-1")
+        self.jwks.remove()
+        self.store.ttl = 0
+        assert self.store.get_key("key-1") is not None
+
+    def test_error_when_provider_down_without_keys(self):
+        self.jwks.remove()
+        with self.assertRaises(JWKSError):
+            self.store.get_key("key-1")
+
+
+class LocalAuth0TestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_pem, cls.public_jwk = make_signing_key("key-1")
+
+    def setUp(self):
+        self.jwks = LocalJWKS([self.public_jwk])
+        self.environ = dict(os.environ)
+        os.environ.update(
+            {
+                "AUTH0_DOMAIN": issuer_domain,
+                "AUTH0_IDENTIFIER": audience,
+                "AUTH0_ALGORITHM": "RS256",
+                "AUTH0_JWKS_URL": self.jwks.url,
+            }
+        )
+
+    def tearDown(self):
+        self.jwks.remove()
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+
+class VerifyDecodeJWTTestCase(LocalAuth0TestCase):
+    def test_decode_token_signed_by_local_jwks(self):
+        token = make_token(self.private_pem, "key-1", ["read:movies"])
+        payload = verify_decode_jwt(token)
+        assert payload["permissions"] == ["read:movies"]
+        assert get_jwks_store().url == self.jwks.url
+
+    def test_401_token_with_unknown_kid(self):
+        token = make_token(self.private_pem, "unknown-kid")
+        with self.assertRaises(AuthError) as context:
+            verify_decode_jwt(token)
+        assert context.exception.status_code == 401
+
+    def test_401_expired_token(self):
+        token = make_token(self.private_pem, "key-1", expires_in=-60)
+        with self.assertRaises(AuthError) as context:
+            verify_decode_jwt(token)
+        assert context.exception.error["code"] == "token_expired"
+
+
+class VerifiedTokenCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = VerifiedTokenCache(max_size=2)
+        self.payload = {"exp": int(time.time()) + 3600, "permissions": []}
+
+    def test_hit_after_set(self):
+        assert self.cache.get("a.b.c") is None
+        self.cache.set("a.b.c", self.payload)
+        assert self.cache.get("a.b.c") is self.payload
+
+        stats = self.cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_raw_token_is_not_stored(self):
+        self.cache.set("a.b.c", self.payload)
+        assert "a.b.c" not in self.cache._entries
+
+    def test_entry_expires_at_exp_claim(self):
+        self.cache.set("a.b.c", {"exp": int(time.time()) - 1, "permissions": []})
+        assert self.cache.get("a.b.c") is None
+
+    def test_payload_without_exp_is_not_cached(self):
+        self.cache.set("a.b.c", {"permissions": []})
+        assert self.cache.stats()["size"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a.b.1", self.payload)
+        self.cache.set("a.b.2", self.payload)
+        self.cache.get("a.b.1")
+        self.cache.set("a.b.3", self.payload)
+
+        assert self.cache.get("a.b.1") is not None
+        assert self.cache.get("a.b.2") is None
+        assert self.cache.stats()["evictions"] == 1
+
+    def test_disabled_cache(self):
+        cache = VerifiedTokenCache(enabled=False)
+        cache.set("a.b.c", self.payload)
+        assert cache.get("a.b.c") is None
+        assert cache.stats()["misses"] == 0
+
+
+class DecodeTokenTestCase(LocalAuth0TestCase):
+    def setUp(self):
+        super().setUp()
+        get_token_cache().clear()
+
+    def test_repeat_token_skips_verification(self):
+        token = make_token(self.private_pem, "key-1", ["read:movies"])
+        first = decode_token(token)
+        second = decode_token(token)
+
+        assert first == second
+        stats = get_token_cache().stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import tempfile
+import unittest
+from flask import Flask
+
+from cache import MemoryCacheBackend, cache_enabled
+from cache.entities import EntityCache
+from cache.responses import ResponseCache
+from database import db, setup_db
+from database.actors import Actors
+from database.counts import cached_count, clear_counts, get_count_backend
+from database.events import notify_write
+
+
+class MemoryCacheBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryCacheBackend(max_size=2)
+
+    def test_get_after_set(self):
+        self.backend.set("a", {"id": 1}, 60)
+        assert self.backend.get("a") == {"id": 1}
+
+    def test_entry_expires_after_ttl(self):
+        self.backend.set("a", {"id": 1}, 0)
+        assert self.backend.get("a") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.backend.set("a", 1, 60)
+        self.backend.set("b", 2, 60)
+        self.backend.get("a")
+        self.backend.set("c", 3, 60)
+
+        assert self.backend.get("a") == 1
+        assert self.backend.get("b") is None
+        assert self.backend.stats()["evictions"] == 1
+
+    def test_clear_by_prefix(self):
+        self.backend.set("entity:movies:1", 1, 60)
+        self.backend.set("entity:actors:1", 2, 60)
+        self.backend.clear("entity:movies:")
+
+        assert self.backend.get("entity:movies:1") is None
+        assert self.backend.get("entity:actors:1") == 2
+
+
+class EntityCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = EntityCache(MemoryCacheBackend(), ttl=60)
+
+    def test_second_read_is_a_hit(self):
+        loads = []
+        load = lambda: loads.append(1) or {"id": 1}
+
+        self.cache.get_or_load("movies", 1, load)
+        self.cache.get_or_load("movies", 1, load)
+
+        assert len(loads) == 1
+        assert self.cache.stats()["hit_rate"] == 0.5
+
+    def test_write_invalidates_entry(self):
+        self.cache.get_or_load("movies", 1, lambda: {"title": "old"})
+        self.cache.invalidate("movies", [1])
+
+        value = self.cache.get_or_load("movies", 1, lambda: {"title": "new"})
+        assert value == {"title": "new"}
+
+    def test_read_racing_a_write_is_not_cached(self):
+        def load():
+            # A write commits while the row is being read
+            self.cache.invalidate("movies", [1])
+            return {"title": "old"}
+
+        self.cache.get_or_load("movies", 1, load)
+        value = self.cache.get_or_load("movies", 1, lambda: {"title": "new"})
+        assert value == {"title": "new"}
+
+    def test_missing_entity_is_not_cached(self):
+        self.cache.get_or_load("movies", 1, lambda: None)
+        assert self.cache.get_or_load("movies", 1, lambda: {"id": 1}) == {"id": 1}
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(MemoryCacheBackend(), ttl=60)
+        self.args = [("page", "1"), ("size", "10")]
+
+    def test_same_permissions_share_entries(self):
+        self.cache.get_or_compute("movies", self.args, ["read:movies"], lambda: 1)
+        body = self.cache.get_or_compute(
+            "movies", self.args, ["read:movies"], lambda: 2
+        )
+
+        assert body == 1
+        assert self.cache.stats()["hits"] == 1
+
+    def test_different_permissions_do_not_share_entries(self):
+        self.cache.get_or_compute("movies", self.args, ["read:movies"], lambda: 1)
+        body = self.cache.get_or_compute(
+            "movies", self.args, ["read:movies", "update:movies"], lambda: 2
+        )
+
+        assert body == 2
+
+    def test_generation_bump_invalidates_every_page(self):
+        self.cache.get_or_compute("movies", self.args, [], lambda: 1)
+        self.cache.get_or_compute("movies", [("page", "2")], [], lambda: 1)
+        self.cache.invalidate("movies")
+
+        assert self.cache.get_or_compute("movies", self.args, [], lambda: 2) == 2
+        assert self.cache.get_or_compute("movies", [("page", "2")], [], lambda: 2) == 2
+
+    def test_other_table_is_not_invalidated(self):
+        self.cache.get_or_compute("actors", self.args, [], lambda: 1)
+        self.cache.invalidate("movies")
+
+        assert self.cache.get_or_compute("actors", self.args, [], lambda: 2) == 1
+
+
+class CountCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.app = Flask(__name__)
+        setup_db(self.app, "sqlite:///" + self.path)
+        for index in range(4):
+            Actors("Actor {}".format(index), 30, "male").insert()
+        clear_counts()
+
+    def tearDown(self):
+        db.session.remove()
+        os.remove(self.path)
+
+    def count_men(self):
+        return cached_count(Actors.query.filter(Actors.gender == "male"), 60)
+
+    def test_update_invalidates_filtered_count(self):
+        assert self.count_men() == 4
+
+        actor = Actors.query.get(1)
+        actor.gender = "female"
+        db.session.commit()
+        assert self.count_men() == 4
+
+        notify_write("actors", "update", [1])
+        assert self.count_men() == 3
+
+    def test_counts_are_bounded(self):
+        backend = get_count_backend()
+        for index in range(backend.max_size + 10):
+            cached_count(Actors.query.filter(Actors.name == str(index)), 60)
+        assert backend.stats()["size"] <= backend.max_size
+
+
+class CacheEnabledTestCase(unittest.TestCase):
+    def setUp(self):
+        self.environ = dict(os.environ)
+        for name in ["CACHE_URL", "WEB_CONCURRENCY", "ENTITY_CACHE_ENABLED"]:
+            os.environ.pop(name, None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def test_enabled_in_a_single_worker(self):
+        assert cache_enabled("ENTITY_CACHE_ENABLED")
+
+    def test_disabled_in_several_workers_without_shared_cache(self):
+        os.environ["WEB_CONCURRENCY"] = "4"
+        assert not cache_enabled("ENTITY_CACHE_ENABLED")
+
+    def test_enabled_in_several_workers_with_shared_cache(self):
+        os.environ.update({"WEB_CONCURRENCY": "4", "CACHE_URL": "redis://cache:6379"})
+        assert cache_enabled("ENTITY_CACHE_ENABLED")
+
+    def test_forcing_a_local_cache_in_several_workers_fails(self):
+        os.environ.update({"WEB_CONCURRENCY": "4", "ENTITY_CACHE_ENABLED": "true"})
+        with self.assertRaises(RuntimeError):
+            cache_enabled("ENTITY_CACHE_ENABLED")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import gzip
+import zlib
+import unittest
+from flask import Flask, Response
+
+from compression import compress_response
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config.update(
+        COMPRESS_ENABLED=True,
+        COMPRESS_MIN_SIZE=500,
+        COMPRESS_LEVEL=6,
+        COMPRESS_BR_QUALITY=4,
+    )
+    app.after_request(compress_response)
+
+    @app.route("/large")
+    def large():
+        return Response('{"items": "' + "x" * 2000 + '"}', mimetype="application/json")
+
+    @app.route("/small")
+    def small():
+        return Response('{"success": false}', status=404, mimetype="application/json")
+
+    @app.route("/stream")
+    def stream():
+        def lines():
+            for index in range(3):
+                yield '{"id": %d}\n' % index
+
+        return Response(lines(), mimetype="application/x-ndjson")
+
+    return app
+
+
+class CompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = create_test_app().test_client()
+        self.headers = {"Accept-Encoding": "gzip"}
+
+    def test_large_body_is_gzipped(self):
+        res = self.client.get("/large", headers=self.headers)
+
+        assert res.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in res.headers["Vary"]
+        assert int(res.headers["Content-Length"]) == len(res.data)
+        assert gzip.decompress(res.data).startswith(b'{"items"')
+
+    def test_small_body_is_not_compressed(self):
+        res = self.client.get("/small", headers=self.headers)
+
+        assert res.status_code == 404
+        assert "Content-Encoding" not in res.headers
+        assert res.data == b'{"success": false}'
+
+    def test_identity_when_not_accepted(self):
+        res = self.client.get("/large")
+
+        assert "Content-Encoding" not in res.headers
+        assert len(res.data) > 2000
+
+    def test_stream_is_compressed_chunk_by_chunk(self):
+        res = self.client.get("/stream", headers=self.headers, buffered=False)
+        assert res.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in res.headers
+
+        # Every chunk can be decoded as soon as it arrives
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = iter(res.response)
+        assert decompressor.decompress(next(chunks)) == b'{"id": 0}\n'
+        rest = b"".join(decompressor.decompress(chunk) for chunk in chunks)
+        assert rest == b'{"id": 1}\n{"id": 2}\n'
+
+
+if __name__ == "__main__":
+    unittest.main()
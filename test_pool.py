@@ -0,0 +1,126 @@
+import os
+import runpy
+import unittest
+from sqlalchemy import create_engine
+
+from database.pool import engine_options, pool_stats, TimedQueuePool, wait_stats
+
+
+class PoolSizingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.environ = dict(os.environ)
+        for name in [
+            "DB_POOL_SIZE",
+            "DB_MAX_OVERFLOW",
+            "DB_MAX_CONNECTIONS",
+            "WEB_CONCURRENCY",
+            "DB_INSTANCES",
+            "GUNICORN_THREADS",
+        ]:
+            os.environ.pop(name, None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def test_defaults(self):
+        options = engine_options("postgresql://localhost/casting")
+        assert options["pool_size"] + options["max_overflow"] == 15
+        assert options["pool_pre_ping"] is True
+
+    def test_default_budget_fits_postgres(self):
+        # 17 workers, the default of an 8 CPU machine with sync workers
+        os.environ["WEB_CONCURRENCY"] = "17"
+        options = engine_options("postgresql://localhost/casting")
+        assert 17 * (options["pool_size"] + options["max_overflow"]) <= 100
+
+    def test_pool_never_exceeds_threads(self):
+        os.environ.update({"WEB_CONCURRENCY": "2", "GUNICORN_THREADS": "4"})
+        options = engine_options("postgresql://localhost/casting")
+        assert options["pool_size"] == 4
+        assert options["max_overflow"] == 0
+
+    def test_budget_split_between_workers(self):
+        os.environ.update(
+            {"DB_MAX_CONNECTIONS": "90", "WEB_CONCURRENCY": "4", "DB_INSTANCES": "2"}
+        )
+        options = engine_options("postgresql://localhost/casting")
+        assert options["pool_size"] == 11
+        assert options["max_overflow"] == 0
+        assert 4 * 2 * (options["pool_size"] + options["max_overflow"]) <= 90
+
+    def test_overflow_fills_the_worker_share(self):
+        os.environ.update(
+            {"DB_MAX_CONNECTIONS": "40", "WEB_CONCURRENCY": "4", "DB_POOL_SIZE": "4"}
+        )
+        options = engine_options("postgresql://localhost/casting")
+        assert options["pool_size"] == 4
+        assert options["max_overflow"] == 6
+
+    def test_sqlite_has_no_pool_size(self):
+        options = engine_options("sqlite:///casting.db")
+        assert "pool_size" not in options
+
+
+class GunicornConfigTestCase(unittest.TestCase):
+    def setUp(self):
+        self.environ = dict(os.environ)
+        for name in list(os.environ):
+            if name == "WEB_CONCURRENCY" or name.startswith("GUNICORN_"):
+                os.environ.pop(name)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def load_config(self):
+        return runpy.run_path(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+        )
+
+    def test_threaded_workers_follow_cpu_count(self):
+        config = self.load_config()
+        assert config["workers"] == config["cpu_count"]()
+        assert config["worker_class"] == "gthread"
+        assert config["preload_app"] is True
+        # The pools are sized for the workers and threads gunicorn starts
+        assert os.environ["WEB_CONCURRENCY"] == str(config["workers"])
+        assert os.environ["GUNICORN_THREADS"] == "4"
+
+    def test_sync_workers_oversubscribe_cpus(self):
+        os.environ.update({"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_THREADS": "1"})
+        config = self.load_config()
+        assert config["workers"] == config["cpu_count"]() * 2 + 1
+
+    def test_cpu_count_respects_affinity(self):
+        config = self.load_config()
+        assert 1 <= config["cpu_count"]() <= len(os.sched_getaffinity(0))
+
+    def test_recycling_has_jitter(self):
+        os.environ.update({"WEB_CONCURRENCY": "3", "GUNICORN_MAX_REQUESTS": "500"})
+        config = self.load_config()
+        assert config["workers"] == 3
+        assert config["max_requests"] == 500
+        assert config["max_requests_jitter"] == 50
+
+
+class PoolStatsTestCase(unittest.TestCase):
+    def test_checked_out_and_overflow(self):
+        wait_stats.clear()
+        engine = create_engine(
+            "sqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=1
+        )
+        connections = [engine.connect(), engine.connect()]
+
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 2
+        assert stats["overflow"] == 1
+        assert stats["checkouts"] == 2
+
+        for connection in connections:
+            connection.close()
+        assert pool_stats(engine)["checked_out"] == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import time
+import shutil
+import threading
+import sqlite3
+import datetime
+import tempfile
+import unittest
+from flask import Flask, request
+
+import database.replicas as replicas
+from database import db, setup_db
+from database.movies import Movies
+from database.replicas import ReplicaSet, get_replica_set, pin_after_write
+
+
+def create_test_app(primary):
+    app = Flask(__name__)
+    setup_db(app, "sqlite:///" + primary)
+    app.after_request(pin_after_write)
+
+    @app.route("/title", methods=["GET", "POST"])
+    def title():
+        movie = Movies.query.get(1)
+        if request.method == "POST":
+            movie.title = request.get_json()["title"]
+            movie.update()
+        return movie.title
+
+    return app
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        primary = os.path.join(self.directory, "primary.db")
+        replica = os.path.join(self.directory, "replica.db")
+
+        self.environ = dict(os.environ)
+        os.environ["DATABASE_REPLICA_URLS"] = "sqlite:///" + replica
+        os.environ["REPLICA_CHECK_INTERVAL"] = "0"
+
+        self.app = create_test_app(primary)
+        Movies("Primary", datetime.datetime(2000, 1, 1)).insert()
+        db.session.remove()
+
+        # A replica that has not caught up with the primary yet
+        shutil.copy(primary, replica)
+        connection = sqlite3.connect(replica)
+        connection.execute("UPDATE movies SET title = 'Replica'")
+        connection.commit()
+        connection.close()
+
+        self.client = self.app.test_client()
+        self.measure_lag = replicas.measure_lag
+
+    def tearDown(self):
+        replicas.measure_lag = self.measure_lag
+        db.session.remove()
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.directory)
+
+    def test_get_reads_from_replica(self):
+        res = self.client.get("/title")
+        assert res.data == b"Replica"
+        assert get_replica_set().stats()["replica_reads"] == 1
+
+    def test_client_reads_its_own_writes(self):
+        self.client.post("/title", json={"title": "Written"})
+
+        res = self.client.get("/title")
+        assert res.data == b"Written"
+
+        other = self.client.get("/title", headers={"Authorization": "Bearer other"})
+        assert other.data == b"Replica"
+
+    def test_lagging_replica_is_ejected(self):
+        replicas.measure_lag = lambda engine: 60.0
+
+        res = self.client.get("/title")
+        assert res.data == b"Primary"
+        assert get_replica_set().stats()["replicas"][0]["healthy"] is False
+
+    def test_slow_lag_check_does_not_block_reads(self):
+        replicaSet = get_replica_set()
+        replicaSet.check(replicaSet.replicas[0])
+        started = threading.Event()
+
+        def slow_lag(engine):
+            started.set()
+            time.sleep(1)
+            return 0.0
+
+        replicas.measure_lag = slow_lag
+        checker = threading.Thread(target=replicaSet.refresh)
+        checker.start()
+        started.wait()
+
+        startTime = time.perf_counter()
+        res = self.client.get("/title")
+        replicaSet.stats()
+        elapsed = time.perf_counter() - startTime
+        checker.join()
+
+        assert res.data == b"Replica"
+        assert elapsed < 0.5
+
+    def test_several_workers_require_shared_pins(self):
+        os.environ["WEB_CONCURRENCY"] = "2"
+        os.environ.pop("CACHE_URL", None)
+
+        with self.assertRaises(RuntimeError):
+            ReplicaSet([os.environ["DATABASE_REPLICA_URLS"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
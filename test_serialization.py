@@ -0,0 +1,35 @@
+import json
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+from serialization import dumps, orjson
+
+
+class SerializationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            "title": "Amélie, 東京物語 😀",
+            "release_date": datetime(2001, 4, 25, 12, 30),
+            "day": date(2001, 1, 1),
+            "rating": Decimal("7.5"),
+            "cast": [None, True, 1],
+        }
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_backends_produce_the_same_bytes(self):
+        for indent in (False, True):
+            assert dumps(self.data, "orjson", indent) == dumps(
+                self.data, "json", indent
+            )
+
+    def test_non_ascii_is_written_as_utf8(self):
+        body = dumps(self.data, "json")
+
+        assert "Amélie, 東京物語 😀".encode() in body
+        assert b"\\u" not in body
+        assert json.loads(body)["release_date"] == "2001-04-25T12:30:00"
+
+
+if __name__ == "__main__":
+    unittest.main()
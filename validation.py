@@ -0,0 +1,320 @@
+from errors import RequestError
+from database.projection import format_fields
+
+
+def validate_new_movies(reqBody):
+    if reqBody is None:
+        raise RequestError(
+            {"code": "empty_content", "description": "No movies details provided"},
+            400,
+        )
+
+    if type(reqBody) is not dict:
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid movies details"},
+            400,
+        )
+
+    title = reqBody.get("title")
+    release_date = reqBody.get("release_date")
+
+    if title is None or release_date is None:
+        raise RequestError(
+            {"code": "missing_field", "description": "Missing movies details"},
+            400,
+        )
+
+    if type(title) is not str or type(release_date) is not str:
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid movies details"},
+            400,
+        )
+
+    return {"title": title, "release_date": release_date}
+
+
+def validate_new_actor(reqBody):
+    if reqBody is None:
+        raise RequestError(
+            {"code": "empty_content", "description": "No actor details provided"},
+            400,
+        )
+
+    if type(reqBody) is not dict:
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid actor details"},
+            400,
+        )
+
+    name = reqBody.get("name")
+    age = reqBody.get("age")
+    gender = reqBody.get("gender")
+
+    if name is None or age is None or gender is None:
+        raise RequestError(
+            {"code": "missing_field", "description": "Missing actor details"},
+            400,
+        )
+
+    if type(name) is not str or type(age) is not int or type(gender) is not str:
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid actor details"},
+            400,
+        )
+
+    return {"name": name, "age": age, "gender": gender}
+
+
+def validate_movies_update(reqBody):
+    if type(reqBody) is not dict:
+        raise RequestError(
+            {"code": "empty_content", "description": "No movies details provided"},
+            400,
+        )
+
+    fields = {
+        key: reqBody[key]
+        for key in ["title", "release_date"]
+        if reqBody.get(key) is not None
+    }
+    if len(fields) == 0:
+        raise RequestError(
+            {"code": "empty_content", "description": "No movies details provided"},
+            400,
+        )
+
+    for value in fields.values():
+        if type(value) is not str:
+            raise RequestError(
+                {"code": "invalid_format", "description": "Invalid movies details"},
+                400,
+            )
+
+    return fields
+
+
+def validate_actor_update(reqBody):
+    if type(reqBody) is not dict:
+        raise RequestError(
+            {"code": "empty_content", "description": "No actor details provided"},
+            400,
+        )
+
+    fields = {
+        key: reqBody[key]
+        for key in ["name", "age", "gender"]
+        if reqBody.get(key) is not None
+    }
+    if len(fields) == 0:
+        raise RequestError(
+            {"code": "empty_content", "description": "No actor details provided"},
+            400,
+        )
+
+    if (
+        type(fields.get("name", "")) is not str
+        or type(fields.get("age", 0)) is not int
+        or type(fields.get("gender", "")) is not str
+    ):
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid actor details"},
+            400,
+        )
+
+    return fields
+
+
+def validate_ids(ids, max_size):
+    if type(ids) is not list or len(ids) == 0:
+        raise RequestError(
+            {
+                "code": "empty_content",
+                "description": "Expected a non-empty list of ids",
+            },
+            400,
+        )
+
+    if len(ids) > max_size:
+        raise RequestError(
+            {
+                "code": "batch_too_large",
+                "description": "A batch may contain at most {} records".format(
+                    max_size
+                ),
+            },
+            413,
+        )
+
+    for id in ids:
+        if type(id) is not int:
+            raise RequestError(
+                {"code": "invalid_format", "description": "Ids must be integers"},
+                400,
+            )
+
+    # Drop duplicates but keep the order the client sent
+    return list(dict.fromkeys(ids))
+
+
+def validate_batch_update(reqBody, validate, max_size):
+    # Either {"ids": [...], "fields": {...}} or [{"id": ..., "fields": {...}}, ...]
+    if type(reqBody) is dict:
+        ids = validate_ids(reqBody.get("ids"), max_size)
+        fields = validate(reqBody.get("fields"))
+        return [(id, fields) for id in ids]
+
+    if type(reqBody) is not list:
+        raise RequestError(
+            {
+                "code": "empty_content",
+                "description": "Expected a list of ids or a list of updates",
+            },
+            400,
+        )
+
+    ids = validate_ids(
+        [item.get("id") if type(item) is dict else None for item in reqBody], max_size
+    )
+    updates = {}
+    errors = []
+    for index, item in enumerate(reqBody):
+        try:
+            updates[item["id"]] = validate(item.get("fields"))
+        except RequestError as e:
+            errors.append({"index": index, **e.error})
+
+    if len(errors) > 0:
+        raise RequestError(
+            {
+                "code": "invalid_batch",
+                "description": "Some updates are invalid, nothing was changed",
+                "errors": errors,
+            },
+            400,
+        )
+
+    return [(id, updates[id]) for id in ids]
+
+
+def validate_batch(reqBody, validate, max_size):
+    if type(reqBody) is not list or len(reqBody) == 0:
+        raise RequestError(
+            {
+                "code": "empty_content",
+                "description": "Expected a non-empty array of records",
+            },
+            400,
+        )
+
+    if len(reqBody) > max_size:
+        raise RequestError(
+            {
+                "code": "batch_too_large",
+                "description": "A batch may contain at most {} records".format(
+                    max_size
+                ),
+            },
+            413,
+        )
+
+    # Validate every record so the client gets all errors at once
+    records = []
+    errors = []
+    for index, item in enumerate(reqBody):
+        try:
+            records.append(validate(item))
+        except RequestError as e:
+            errors.append({"index": index, **e.error})
+
+    if len(errors) > 0:
+        raise RequestError(
+            {
+                "code": "invalid_batch",
+                "description": "Some records are invalid, nothing was created",
+                "errors": errors,
+            },
+            400,
+        )
+
+    return records
+
+
+def validate_fields(model, fieldsParam):
+    if fieldsParam is None:
+        return None
+
+    allFields = format_fields(model)
+    requested = [field.strip() for field in fieldsParam.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allFields]
+    if len(requested) == 0 or len(unknown) > 0:
+        raise RequestError(
+            {
+                "code": "invalid_field",
+                "description": "Fields must be a comma separated list of {}".format(
+                    ", ".join(allFields)
+                ),
+            },
+            400,
+        )
+
+    # Keep the order of format() whatever the order requested
+    return [field for field in allFields if field in requested]
+
+
+def validate_search_query(query):
+    # Trigram matching needs at least three characters to work with
+    if query is None or len(query.strip()) < 3:
+        raise RequestError(
+            {
+                "code": "invalid_query",
+                "description": "q must contain at least 3 characters",
+            },
+            400,
+        )
+    return query.strip()
+
+
+def validate_new_casting(reqBody):
+    if reqBody is None:
+        raise RequestError(
+            {"code": "empty_content", "description": "No casting details provided"},
+            400,
+        )
+
+    if type(reqBody) is not dict:
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid casting details"},
+            400,
+        )
+
+    actor_id = reqBody.get("actor_id")
+    role = reqBody.get("role")
+
+    if actor_id is None or role is None:
+        raise RequestError(
+            {"code": "missing_field", "description": "Missing casting details"},
+            400,
+        )
+
+    if type(actor_id) is not int or type(role) is not str or role.strip() == "":
+        raise RequestError(
+            {"code": "invalid_format", "description": "Invalid casting details"},
+            400,
+        )
+
+    return {"actor_id": actor_id, "role": role}
+
+
+def validate_include(includeParam, allowed):
+    if includeParam is None:
+        return False
+
+    if includeParam != allowed:
+        raise RequestError(
+            {
+                "code": "invalid_include",
+                "description": "Include must be {}".format(allowed),
+            },
+            400,
+        )
+    return True